@@ -5,15 +5,24 @@ import os
 
 # Import Jira integration
 try:
-    from integrations.jira_client import jira_create_ticket, is_demo_mode
+    from integrations.jira_client import jira_create_ticket, ajira_create_ticket, is_demo_mode
+    from integrations.ticket_queue import jira_enqueue_ticket
     JIRA_AVAILABLE = True
 except ImportError:
     JIRA_AVAILABLE = False
     def jira_create_ticket(*args, **kwargs):
         return "Jira integration not available"
+    async def ajira_create_ticket(*args, **kwargs):
+        return "Jira integration not available"
+    def jira_enqueue_ticket(*args, **kwargs):
+        return "Jira integration not available"
     def is_demo_mode():
         return True
 
+# Create tickets through the write-behind queue (set JIRA_TICKET_QUEUE=0 to
+# create them inline and wait for Jira)
+TICKET_QUEUE_ENABLED = os.environ.get("JIRA_TICKET_QUEUE", "1") != "0"
+
 class EscalationAgent:
     def __init__(self):
         self.workarounds = {
@@ -30,6 +39,25 @@ class EscalationAgent:
 
     def run(self, state: AgentState):
         print("--- Escalation Agent ---")
+        plan = self._plan(state)
+        if TICKET_QUEUE_ENABLED:
+            jira_result = jira_enqueue_ticket(**plan["ticket"], user_id=plan["user_id"], session_id=state.get("session_id"))
+        else:
+            jira_result = jira_create_ticket(**plan["ticket"])
+        return self._respond(state, plan, jira_result)
+
+    async def arun(self, state: AgentState):
+        """Async variant of run: ticket creation does not block the event loop"""
+        print("--- Escalation Agent (async) ---")
+        plan = self._plan(state)
+        if TICKET_QUEUE_ENABLED:
+            jira_result = jira_enqueue_ticket(**plan["ticket"], user_id=plan["user_id"], session_id=state.get("session_id"))
+        else:
+            jira_result = await ajira_create_ticket(**plan["ticket"])
+        return self._respond(state, plan, jira_result)
+
+    def _plan(self, state: AgentState) -> dict:
+        """Work out priority, tone, workaround and the ticket to create"""
         messages = state['messages']
         last_message = messages[-1]['content'].lower()
         original_message = messages[-1]['content']
@@ -64,17 +92,32 @@ class EscalationAgent:
         else:
             intro = "I understand this needs attention. I'm escalating to our support team."
         
-        # Create Jira Ticket
-        jira_result = jira_create_ticket(
-            summary=f"[IT Support] {original_message[:40]}...",
-            description=f"**User:** {user_id}\n**Department:** {context['department']}\n**VIP:** {'Yes' if context['vip'] else 'No'}\n**Sentiment:** {sentiment}\n\n**Issue:**\n{original_message}\n\n---\n*Created by IT Support Genius AI*",
-            priority=priority
-        )
+        # Jira Ticket to create
+        ticket = {
+            "summary": f"[IT Support] {original_message[:40]}...",
+            "description": f"**User:** {user_id}\n**Department:** {context['department']}\n**VIP:** {'Yes' if context['vip'] else 'No'}\n**Sentiment:** {sentiment}\n\n**Issue:**\n{original_message}\n\n---\n*Created by IT Support Genius AI*",
+            "priority": priority
+        }
+        
+        return {
+            "user_id": user_id,
+            "context": context,
+            "priority": priority,
+            "est_time": est_time,
+            "workaround": workaround,
+            "intro": intro,
+            "ticket": ticket
+        }
+
+    def _respond(self, state: AgentState, plan: dict, jira_result: str):
+        """Build the user-facing response and state update"""
+        intro, priority, est_time = plan["intro"], plan["priority"], plan["est_time"]
+        user_id, context, workaround = plan["user_id"], plan["context"], plan["workaround"]
         
         # Build response
         response = f"""{intro}
 
-**🎫 Jira Ticket Created:** {jira_result}
+**🎫 Jira Ticket:** {jira_result}
 
 | Detail | Value |
 |--------|-------|
@@ -1,8 +1,9 @@
 from state import AgentState, AuditLogger
-from utils.llm import analyze_request, get_llm
+from utils.llm import (
+    analyze_request, analyze_intake, aanalyze_request, aanalyze_intake, summary_needs_update,
+    SUMMARY_MAX_PENDING
+)
 from tools.mcp_tools import get_user_context
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
 
 class IntakeAgent:
     def __init__(self):
@@ -11,18 +12,63 @@ class IntakeAgent:
     def run(self, state: AgentState):
         print("--- Intake Agent (Creative) ---")
         messages = state['messages']
-        last_message = messages[-1]['content']
-        user_id = state.get("user_id", "unknown_user")
         
         # 1. Fetch Predictive Context
-        context = get_user_context(user_id)
+        context = get_user_context(state.get("user_id", "unknown_user"))
         
-        # 2. Generate conversation summary for multi-turn context
-        conversation_summary = self._generate_conversation_summary(messages)
+        # 2. Analyze request; when the new turn changes the topic, it and every
+        #    earlier unsummarized message are classified and folded into the
+        #    rolling summary in one LLM round-trip
+        summarized, fold = self._summary_plan(state)
+        if fold:
+            analysis = analyze_intake(messages, state.get("conversation_summary", ""), summarized)
+        else:
+            analysis = analyze_request(messages[-1]['content'])
         
-        # 3. Analyze request with context awareness
-        analysis = analyze_request(last_message)
+        return self._route(state, self._with_summary(state, analysis, summarized, fold), context)
+
+    async def arun(self, state: AgentState):
+        """Async variant of run: the LLM call does not block the event loop"""
+        print("--- Intake Agent (Creative, async) ---")
+        messages = state['messages']
+        context = get_user_context(state.get("user_id", "unknown_user"))
         
+        summarized, fold = self._summary_plan(state)
+        if fold:
+            analysis = await aanalyze_intake(messages, state.get("conversation_summary", ""), summarized)
+        else:
+            analysis = await aanalyze_request(messages[-1]['content'])
+        
+        return self._route(state, self._with_summary(state, analysis, summarized, fold), context)
+
+    @staticmethod
+    def _summary_plan(state: AgentState):
+        """
+        (summarized, fold): leading messages already covered by the summary (none
+        known: the whole window is new), and whether to fold the rest in now -
+        when there are unsummarized messages and the topic moved on (or too many are pending)
+        """
+        messages = state['messages']
+        summarized = min(state.get("summarized_messages", 0), len(messages) - 1)
+        pending = len(messages) - 1 - summarized
+        if pending <= 0:
+            return summarized, False
+        previous_summary = state.get("conversation_summary", "")
+        return summarized, pending >= SUMMARY_MAX_PENDING or summary_needs_update(previous_summary, messages[-1]['content'])
+
+    @staticmethod
+    def _with_summary(state: AgentState, analysis: dict, summarized: int, fold: bool) -> dict:
+        """Record the summary the analysis leaves behind and how many messages it covers"""
+        if fold:
+            analysis["summarized_messages"] = len(state['messages'])
+        else:
+            analysis["summary"] = state.get("conversation_summary", "")
+            analysis["summarized_messages"] = summarized
+        return analysis
+
+    def _route(self, state: AgentState, analysis: dict, context: dict):
+        """Apply escalation rules to the analysis and build the state update"""
+        conversation_summary = analysis.get("summary", "")
         intent = analysis.get("intent", "KnowledgeAgent")
         sentiment = analysis.get("sentiment", "Neutral")
         urgency = analysis.get("urgency", "Medium")
@@ -55,42 +101,6 @@ class IntakeAgent:
             "sentiment": sentiment, 
             "urgency": urgency,
             "conversation_summary": conversation_summary,
+            "summarized_messages": analysis.get("summarized_messages", 0),
             "audit_log": audit_log
         }
-    
-    def _generate_conversation_summary(self, messages: list) -> str:
-        """Generate a summary of the conversation for multi-turn context"""
-        if len(messages) <= 1:
-            return ""
-        
-        # Get last few messages for context
-        recent_messages = messages[-5:]  # Last 5 messages
-        
-        try:
-            llm = get_llm()
-            template = """
-            Summarize this IT support conversation in 1-2 sentences for context:
-            
-            {conversation}
-            
-            Summary (focus on the user's issue and any actions taken):
-            """
-            
-            conversation_text = "\n".join([
-                f"{m['role'].upper()}: {m['content'][:200]}" 
-                for m in recent_messages
-            ])
-            
-            prompt = ChatPromptTemplate.from_template(template)
-            chain = prompt | llm | StrOutputParser()
-            
-            summary = chain.invoke({"conversation": conversation_text})
-            print(f"Conversation Summary: {summary[:100]}...")
-            return summary.strip()
-            
-        except Exception as e:
-            print(f"Summary generation failed: {e}")
-            # Fallback: just return the last message
-            if len(messages) > 1:
-                return f"Previous topic: {messages[-2]['content'][:100]}"
-            return ""
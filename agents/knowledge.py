@@ -3,10 +3,13 @@ Knowledge Agent with Inline Knowledge Base
 
 Uses a simple in-memory knowledge base for demo reliability,
 with optional RAG enhancement when embeddings are available.
+When an LLM is configured the answer is generated from the matched articles
+(and streamed to the chat); otherwise the articles are shown as-is.
 """
 
 from state import AgentState, AuditLogger
-from utils.llm import get_llm
+from utils.llm import get_llm, mock_llm_rag_response, amock_llm_rag_response
+from utils.search import BM25Index
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 import os
@@ -48,49 +51,77 @@ KNOWLEDGE_BASE = {
 }
 
 
+# Optional prebuilt index snapshot (JSON) for large knowledge bases
+KB_INDEX_SNAPSHOT = os.environ.get("KB_INDEX_SNAPSHOT", "")
+
+# Generate (and stream) answers from the matched articles; each one is an
+# uncached Gemini call, so set KNOWLEDGE_LLM_ANSWERS=0 to show the articles as-is
+KNOWLEDGE_LLM_ANSWERS = os.environ.get("KNOWLEDGE_LLM_ANSWERS", "1") != "0"
+
+
+def _build_knowledge_index() -> BM25Index:
+    """Load the BM25 index from a snapshot if configured and current, else build it from KNOWLEDGE_BASE"""
+    # Category and topic names are indexed with the article so "vpn setup" hits vpn/setup
+    documents = {
+        f"{category}/{topic}": f"{category} {topic.replace('_', ' ')} {content}"
+        for category, topics in KNOWLEDGE_BASE.items()
+        for topic, content in topics.items()
+    }
+    if KB_INDEX_SNAPSHOT and os.path.exists(KB_INDEX_SNAPSHOT):
+        index = BM25Index.load(KB_INDEX_SNAPSHOT)
+        if index.fingerprint == BM25Index.corpus_fingerprint(documents):
+            print(f"[Knowledge] Loaded index snapshot: {KB_INDEX_SNAPSHOT}")
+            return index
+        print(f"[Knowledge] Index snapshot {KB_INDEX_SNAPSHOT} is stale - rebuilding")
+    
+    index = BM25Index.from_documents(documents)
+    if KB_INDEX_SNAPSHOT:
+        index.save(KB_INDEX_SNAPSHOT)
+    return index
+
+
+# Built once at import
+KNOWLEDGE_INDEX = _build_knowledge_index()
+
+
 class KnowledgeAgent:
     def __init__(self):
         pass
 
-    def _search_knowledge(self, query: str) -> str:
-        """Search the in-memory knowledge base"""
-        query_lower = query.lower()
+    def _search_knowledge(self, query: str, k: int = 3) -> str:
+        """Search the knowledge base index and return the top-k articles by BM25 score"""
         matches = []
+        for doc_id, score in KNOWLEDGE_INDEX.search(query, k=k):
+            category, topic = doc_id.split("/", 1)
+            article = KNOWLEDGE_BASE.get(category, {}).get(topic)
+            if article is None:
+                continue  # removed since the index was built
+            matches.append(article)
         
-        # Search through all categories and topics
-        for category, topics in KNOWLEDGE_BASE.items():
-            if category in query_lower:
-                for topic, content in topics.items():
-                    matches.append(content)
-                    if len(matches) >= 3:
-                        break
-        
-        # If no category match, search content
-        if not matches:
-            for category, topics in KNOWLEDGE_BASE.items():
-                for topic, content in topics.items():
-                    if any(word in query_lower for word in topic.split("_")):
-                        matches.append(content)
-                    elif any(word in content.lower() for word in query_lower.split()[:3]):
-                        matches.append(content)
-                    if len(matches) >= 3:
-                        break
-        
-        return "\n\n".join(matches[:3]) if matches else ""
+        return "\n\n".join(matches) if matches else ""
 
     def run(self, state: AgentState):
         print("--- Knowledge Agent ---")
-        messages = state['messages']
-        last_message = messages[-1]['content']
-        
-        # Search knowledge base
-        context = self._search_knowledge(last_message)
+        query = state['messages'][-1]['content']
+        context = self._search_knowledge(query)
+        answer = mock_llm_rag_response(query, context, fallback=None) if KNOWLEDGE_LLM_ANSWERS else None
+        return self._respond(state, query, context, answer)
+
+    async def arun(self, state: AgentState):
+        """Async variant of run; the index lookup is in-memory, the LLM answer is awaited"""
+        print("--- Knowledge Agent (async) ---")
+        query = state['messages'][-1]['content']
+        context = self._search_knowledge(query)
+        answer = await amock_llm_rag_response(query, context, fallback=None) if KNOWLEDGE_LLM_ANSWERS else None
+        return self._respond(state, query, context, answer)
+
+    def _respond(self, state: AgentState, last_message: str, context: str, answer: str = None):
         docs_found = len(context.split("\n\n")) if context else 0
         
-        # Generate response (works with or without LLM)
+        # Generate response (LLM answer streamed via the rag chain, else the articles themselves)
         if context:
             confidence = 0.85
-            response = f"Based on our IT documentation:\n\n{context}"
+            response = answer or f"Based on our IT documentation:\n\n{context}"
         else:
             response = "I don't have specific information about this in our knowledge base. Let me connect you with our IT team.\n\n📞 **IT Support:** (555) 123-4567\n📧 **Email:** support@company.com"
             confidence = 0.3
@@ -103,6 +134,7 @@ class KnowledgeAgent:
         audit_log = AuditLogger.log(state, "KnowledgeAgent", "knowledge_query", {
             "query": last_message[:50],
             "docs_found": docs_found,
+            "generated": answer is not None,
             "confidence": confidence
         })
         
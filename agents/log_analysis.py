@@ -1,32 +1,90 @@
 from state import AgentState, AuditLogger
-from tools.mcp_tools import fetch_recent_logs, create_ticket
+from tools.mcp_tools import create_ticket
+from tools.log_sources import get_log_sources
+from tools.signatures import get_signature_engine, ScanResult
+from tools.log_checkpoints import get_checkpoint_store, scan_source
+from tools.log_index import parse_time_window, window_lines
+from tools.log_columns import LogColumns, LogStats
+from datetime import datetime, timezone
+import asyncio
 import random
 
+# A minute in which at least this share of entries are ERROR or worse is a
+# spike - if it has enough lines for the share to mean anything
+ERROR_RATE_HIGH = 0.2
+SPIKE_MIN_LINES = 10
+
 class LogAnalysisAgent:
     def __init__(self):
-        self.threat_patterns = {
-            "ransomware": ["encrypt", ".crypt", "ransom", "bitcoin", "wannacry"],
-            "phishing": ["phishing", "credential", "harvest", "suspicious link"],
-            "exfiltration": ["exfil", "large upload", "dropbox", "sensitive data"],
-            "intrusion": ["unauthorized", "port scan", "brute force", "failed login"],
-        }
+        # Threat, error and warning indicators live in tools.signatures
+        # (built-in defaults plus the hot-reloaded LOG_SIGNATURES_PATH file)
+        self.signatures = get_signature_engine()
+
+    @staticmethod
+    def _sampled(lines, sample: list, limit: int = 200):
+        """Pass lines through, keeping the first `limit` characters for the response"""
+        size = sum(len(s) + 1 for s in sample)
+        for line in lines:
+            if size < limit:
+                sample.append(line.raw.decode("utf-8", "replace"))
+                size += len(line.raw) + 1
+            yield line
+
+    async def arun(self, state: AgentState):
+        """Async variant of run; log fetching and scanning happen in a worker thread"""
+        return await asyncio.to_thread(self.run, state)
 
     def run(self, state: AgentState):
         print("--- Log Analysis Agent ---")
         user_id = state.get("user_id", "unknown_user")
         
-        # Fetch logs
-        logs = fetch_recent_logs(user_id)
+        # "last 15 minutes" etc. narrows the analysis to a time window
+        messages = state.get("messages") or []
+        window = parse_time_window(messages[-1]['content']) if messages else None
         
-        # Pattern detection
-        detected_threats = []
-        for threat_type, patterns in self.threat_patterns.items():
-            for pattern in patterns:
-                if pattern.lower() in logs.lower():
-                    detected_threats.append(threat_type)
-                    break
+        # Stream log lines and classify each one in a single pass; files
+        # resume from their checkpoint, so only appended data is scanned
+        scan = ScanResult()
+        totals = LogStats()  # level/error aggregates the severity is based on
+        sample = []
+        sources = get_log_sources(user_id)
+        store = get_checkpoint_store()
+        anchor = None
+        new_threats = set()  # threats on lines no earlier check has seen
+        for source in sources:
+            if window is None:
+                found = scan_source(
+                    source, self.signatures, store,
+                    wrap=lambda lines: self._sampled(lines, sample), stats=totals
+                )
+                scan.merge(found)
+                new_threats.update(found.new_threats)
+                continue
+            if source.seekable:
+                # Brings checkpoint and time index up to date; its hits are the new ones
+                new_threats.update(scan_source(source, self.signatures, store).new_threats)
+            lines, latest = window_lines(source, window)
+            if latest is not None:
+                anchor = latest if anchor is None else max(anchor, latest)
+            columns = LogColumns()
+            found = self.signatures.scan(self._sampled(columns.observe(lines, source.name), sample), source.name)
+            scan.merge(found)
+            totals.merge(columns.stats())
+            if not source.seekable:
+                new_threats.update(found.new_threats)
+        logs = "\n".join(sample) or (
+            "(no log lines in the requested window)" if window else "(no new log lines since the last check)"
+        )
+        # Only new threats alert and open a ticket; earlier ones were reported by a previous check
+        detected_threats = [t for t in scan.threats if t in new_threats]
+        reported_threats = [t for t in scan.threats if t not in new_threats]
         
-        # Determine severity
+        # Determine severity from the level statistics (threat signatures override)
+        stats = totals.summary(min_lines=SPIKE_MIN_LINES)
+        peak_at = (
+            datetime.fromtimestamp(stats["peak_minute"], timezone.utc).strftime("%H:%M")
+            if stats["peak_minute"] is not None else "n/a"
+        )
         severity = "Medium"
         confidence = 0.7
         
@@ -36,20 +94,32 @@ class LogAnalysisAgent:
             threat_str = ", ".join([f"**{t.upper()}**" for t in set(detected_threats)])
             diagnosis = f"Security threats detected: {threat_str}"
             fix = "Immediately isolate affected systems. Security team has been notified."
-        elif "error" in logs.lower():
+        elif stats["critical"] or stats["peak_error_rate"] >= ERROR_RATE_HIGH:
             severity = "High"
-            confidence = 0.75
-            diagnosis = "Error patterns detected in logs"
+            confidence = 0.8
+            diagnosis = (
+                f"{stats['errors']} error-level entries ({stats['error_share']:.1%} of {stats['lines']} lines), "
+                f"{stats['critical']} critical; peak {stats['peak_error_rate']:.0%} errors/min at {peak_at}"
+            )
             fix = "Review error logs and address root cause. Consider restarting affected services."
-        elif "warning" in logs.lower():
+        elif stats["errors"] or scan.has("error"):
             severity = "Medium"
-            diagnosis = "Warning patterns found in logs"
+            confidence = 0.75
+            diagnosis = f"Sporadic errors: {stats['errors']} error-level entries ({stats['error_share']:.1%} of {stats['lines']} lines)"
+            fix = "Review error logs and address root cause if they recur."
+        elif stats["warnings"] or scan.has("warning"):
+            severity = "Medium"
+            diagnosis = f"Warning patterns found in logs ({stats['warnings']} warnings)"
             fix = "Monitor closely and address if issues persist."
         else:
             severity = "Low"
             diagnosis = "No significant issues detected"
             fix = "System appears healthy. Continue monitoring."
         
+        if reported_threats:
+            earlier = ", ".join(t.upper() for t in reported_threats)
+            diagnosis += f" (already reported: {earlier} - no new occurrences)"
+        
         response_parts = []
         
         # Threat header
@@ -58,19 +128,43 @@ class LogAnalysisAgent:
             threat_display = " ".join([f"{threat_icons.get(t, '⚠️')} {t.upper()}" for t in set(detected_threats)])
             response_parts.append(f"## 🚨 SECURITY ALERT\n{threat_display}\n")
         
+        window_row = ""
+        if window:
+            until = datetime.fromtimestamp(anchor, timezone.utc).strftime("%Y-%m-%d %H:%M:%S") if anchor else "n/a"
+            window_row = f"\n| **Window** | last {window // 60} min (up to {until}) |"
+        
         response_parts.append(f"""**📋 Log Analysis Results**
 
 | Detail | Value |
 |--------|-------|
 | **Diagnosis** | {diagnosis} |
 | **Severity** | {severity} |
-| **Recommendation** | {fix} |
+| **Recommendation** | {fix} |{window_row}
 
 **Sample Logs:**
 ```
 {logs[:200]}...
 ```""")
         
+        # Level histogram and the components producing the most errors
+        if stats["lines"]:
+            histogram = " · ".join(f"{level} {count}" for level, count in stats["severity"].items())
+            components = ", ".join(f"`{name}` ({count})" for name, count in stats["top_components"]) or "none"
+            response_parts.append(f"\n**📊 Log Statistics:** {histogram}\n\n**Top error sources:** {components}")
+        
+        # Which signatures fired, and where
+        if scan.hits:
+            hit_lines = []
+            for name, count in sorted(scan.hits.items(), key=lambda item: -item[1]):
+                refs = ", ".join(
+                    f"{src}:{number}" if len(sources) > 1 else str(number)
+                    for src, number in scan.lines[name][:5]
+                )
+                hit_lines.append(f"- `{name}` × {count} (lines {refs}{', ...' if count > 5 else ''})")
+            response_parts.append(
+                f"\n**🔎 Signature Hits** ({scan.new_lines} new of {scan.lines_scanned} lines scanned):\n" + "\n".join(hit_lines)
+            )
+        
         # Auto-create ticket if critical
         if severity == "Critical" or detected_threats:
             ticket_result = create_ticket(
@@ -86,7 +180,11 @@ class LogAnalysisAgent:
         
         audit_log = AuditLogger.log(state, "LogAnalysisAgent", "logs_analyzed", {
             "threats": detected_threats,
-            "severity": severity
+            "reported_threats": reported_threats,
+            "severity": severity,
+            "hits": scan.hits,
+            "window_seconds": window,
+            "stats": {k: stats[k] for k in ("lines", "errors", "critical", "peak_error_rate")}
         })
             
         return {
@@ -4,7 +4,7 @@ from tools.mcp_tools import (
     reset_mfa, onboard_user, offboard_user, grant_temp_admin,
     check_hardware_eligibility, order_peripheral, reboot_server, submit_facility_request
 )
-from utils.llm import select_tool
+from utils.llm import select_tool, aselect_tool
 
 class WorkflowAgent:
     def __init__(self):
@@ -21,18 +21,28 @@ class WorkflowAgent:
             "reboot_server": {"func": reboot_server, "desc": "Reboot a server", "sensitive": True},
             "submit_facility_request": {"func": submit_facility_request, "desc": "Report facility issues", "sensitive": False}
         }
+        
+        # Tool descriptions for LLM
+        self.tools_desc = "\n".join([f"- {name}: {meta['desc']}" for name, meta in self.TOOL_REGISTRY.items()])
 
     def run(self, state: AgentState):
         print("--- Workflow Agent ---")
-        user_id = state.get("user_id", "unknown_user")
-        messages = state['messages']
-        last_message = messages[-1]['content']
-        
-        # Tool descriptions for LLM
-        tools_desc = "\n".join([f"- {name}: {meta['desc']}" for name, meta in self.TOOL_REGISTRY.items()])
+        last_message = state['messages'][-1]['content']
         
         # Select tool
-        selection = select_tool(last_message, tools_desc)
+        selection = select_tool(last_message, self.tools_desc)
+        return self._execute(state, selection)
+
+    async def arun(self, state: AgentState):
+        """Async variant of run: tool selection does not block the event loop"""
+        print("--- Workflow Agent (async) ---")
+        selection = await aselect_tool(state['messages'][-1]['content'], self.tools_desc)
+        return self._execute(state, selection)
+
+    def _execute(self, state: AgentState, selection: dict):
+        """Run (or request approval for) the selected tool and build the state update"""
+        user_id = state.get("user_id", "unknown_user")
+        last_message = state['messages'][-1]['content']
         tool_name = selection.get("tool_name", "None")
         args = selection.get("arguments", {})
         reasoning = selection.get("reasoning", "")
@@ -1,6 +1,8 @@
 import streamlit as st
 import os
+import queue
 import time
+import uuid
 from datetime import datetime
 from collections import Counter
 
@@ -16,7 +18,15 @@ if "JIRA_EMAIL" in st.secrets:
 if "JIRA_API_TOKEN" in st.secrets:
     os.environ["JIRA_API_TOKEN"] = st.secrets["JIRA_API_TOKEN"]
 
-from main import app as graph_app
+from utils.scheduler import RequestScheduler, DONE
+from utils.metrics import StreamingHistogram, RollingRate
+from utils.audit import get_audit_sink
+from state import merge_update
+
+# Rolling window (requests) for automation/escalation/satisfaction rates
+METRICS_WINDOW = 100
+# Most recent chat messages sent to the graph per turn
+CONTEXT_WINDOW = 6
 
 # Import Jira client for status display
 try:
@@ -26,6 +36,36 @@ except ImportError:
     JIRA_AVAILABLE = False
 
 
+# --- Process-wide shared resources (built once, reused by every session and rerun) ---
+@st.cache_resource
+def get_graph():
+    from main import app
+    return app
+
+@st.cache_resource
+def get_shared_jira_client():
+    return get_jira_client() if JIRA_AVAILABLE else None
+
+@st.cache_resource
+def get_retrieval_store():
+    # Open the retrieval store in the background so the first query doesn't pay for it
+    try:
+        from utils.rag import get_vector_store, warm_up_vector_store
+    except ImportError:
+        return None
+    warm_up_vector_store()
+    return get_vector_store
+
+@st.cache_resource
+def get_scheduler():
+    return RequestScheduler(max_workers=int(os.environ.get("APP_GRAPH_WORKERS", 8)))
+
+graph_app = get_graph()
+jira_client = get_shared_jira_client()
+get_retrieval_store()
+scheduler = get_scheduler()
+
+
 st.set_page_config(
     page_title="IT Support Genius", 
     page_icon="🤖", 
@@ -42,6 +82,21 @@ USER_PROFILES = {
     "Frustrated User": {"id": "user_angry", "icon": "😤", "desc": "Tests empathy engine"},
 }
 
+def new_metrics() -> dict:
+    """Fresh dashboard metrics: fixed-size histograms and rolling rates, so memory stays flat"""
+    return {
+        "total_requests": 0,
+        "automated": 0,
+        "escalated": 0,
+        "approvals_pending": 0,
+        "response_times": StreamingHistogram.log_spaced(),
+        "agent_distribution": Counter(),
+        "satisfaction_scores": RollingRate(window=METRICS_WINDOW),
+        "confidence_scores": StreamingHistogram.linear(0.0, 1.0),
+        "automation_rate": RollingRate(window=METRICS_WINDOW),
+        "escalation_rate": RollingRate(window=METRICS_WINDOW)
+    }
+
 # Initialize session state
 if "messages" not in st.session_state:
     st.session_state.messages = []
@@ -49,22 +104,26 @@ if "user_profile" not in st.session_state:
     st.session_state.user_profile = "Regular Employee"
 if "last_result" not in st.session_state:
     st.session_state.last_result = None
+if "summary" not in st.session_state:
+    st.session_state.summary = {"text": "", "messages": 0}  # rolling summary and how many messages it covers
 if "metrics" not in st.session_state:
-    st.session_state.metrics = {
-        "total_requests": 0,
-        "automated": 0,
-        "escalated": 0,
-        "approvals_pending": 0,
-        "response_times": [],
-        "agent_distribution": Counter(),
-        "satisfaction_scores": [],
-        "confidence_scores": []
-    }
-if "audit_log" not in st.session_state:
-    st.session_state.audit_log = []
+    st.session_state.metrics = new_metrics()
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+if "audit_since" not in st.session_state:
+    st.session_state.audit_since = datetime.now().isoformat()
 if "pending_approvals" not in st.session_state:
     st.session_state.pending_approvals = []
 
+# Status lines shown as each graph node finishes
+NODE_STATUS = {
+    "intake": "🎯 Intake Agent analyzed request",
+    "knowledge": "📚 Knowledge Agent answered",
+    "workflow": "⚙️ Workflow Agent executed",
+    "escalation": "🚨 Escalation Agent created ticket",
+    "log_analysis": "🔍 Log Analysis Agent scanned logs",
+}
+
 # --- Header ---
 col1, col2, col3 = st.columns([2, 1, 1])
 with col1:
@@ -134,8 +193,18 @@ with tab_about:
 with tab_audit:
     st.subheader("📋 Action Audit Log")
     
-    if st.session_state.audit_log:
-        for entry in reversed(st.session_state.audit_log[-20:]):  # Last 20 entries
+    agent_filter = st.selectbox(
+        "Agent",
+        ["All", "IntakeAgent", "KnowledgeAgent", "WorkflowAgent", "EscalationAgent", "LogAnalysisAgent", "TicketQueue"]
+    )
+    entries = get_audit_sink().query(
+        agent=None if agent_filter == "All" else agent_filter,
+        session_id=st.session_state.session_id,
+        since=st.session_state.audit_since,
+        limit=20
+    )
+    if entries:
+        for entry in entries:  # Newest first
             with st.expander(f"{entry['timestamp'][:19]} | {entry['agent']} → {entry['action']}", expanded=False):
                 st.json(entry)
     else:
@@ -201,20 +270,12 @@ with tab_chat:
             if st.button("🗑️ Clear", use_container_width=True):
                 st.session_state.messages = []
                 st.session_state.last_result = None
+                st.session_state.summary = {"text": "", "messages": 0}
                 st.rerun()
         with col2:
             if st.button("📊 Reset", use_container_width=True):
-                st.session_state.metrics = {
-                    "total_requests": 0,
-                    "automated": 0,
-                    "escalated": 0,
-                    "approvals_pending": 0,
-                    "response_times": [],
-                    "agent_distribution": Counter(),
-                    "satisfaction_scores": [],
-                    "confidence_scores": []
-                }
-                st.session_state.audit_log = []
+                st.session_state.metrics = new_metrics()
+                st.session_state.audit_since = datetime.now().isoformat()
                 st.rerun()
         
         st.divider()
@@ -238,29 +299,32 @@ with tab_chat:
         
         st.divider()
         
+        # --- Shared Resources ---
+        load = scheduler.stats()
+        jira_mode = "Demo" if jira_client is None else jira_client.status.capitalize()
+        st.caption(f"🎫 Jira: {jira_mode} | ⚙️ Workers: {load['running']}/{load['workers']} busy, {load['pending']} queued")
+        
         # --- Live Metrics ---
         st.subheader("📊 Live Metrics")
         
         metrics = st.session_state.metrics
         total = metrics["total_requests"]
         
-        if total > 0:
-            auto_rate = ((total - metrics["escalated"]) / total) * 100
-            avg_time = sum(metrics["response_times"]) / len(metrics["response_times"]) if metrics["response_times"] else 0
-            avg_conf = sum(metrics["confidence_scores"]) / len(metrics["confidence_scores"]) if metrics["confidence_scores"] else 0
-        else:
-            auto_rate = 0
-            avg_time = 0
-            avg_conf = 0
+        latency = metrics["response_times"].percentiles()
+        auto_rate = metrics["automation_rate"].rate * 100
+        esc_rate = metrics["escalation_rate"].rate * 100
+        avg_conf = metrics["confidence_scores"].mean
         
         col1, col2 = st.columns(2)
-        col1.metric("Automation", f"{auto_rate:.0f}%")
-        col2.metric("Avg Time", f"{avg_time:.1f}s")
+        col1.metric("Automation", f"{auto_rate:.0f}%", help=f"Last {len(metrics['automation_rate'])} requests")
+        col2.metric("Escalation", f"{esc_rate:.0f}%", help=f"Last {len(metrics['escalation_rate'])} requests")
         
         col3, col4 = st.columns(2)
         col3.metric("Requests", total)
         col4.metric("Avg Conf.", f"{avg_conf:.0%}")
         
+        st.caption(f"⏱️ p50 {latency['p50']:.1f}s | p95 {latency['p95']:.1f}s | p99 {latency['p99']:.1f}s")
+        
         # Agent Distribution
         if metrics["agent_distribution"]:
             st.markdown("**Agent Usage:**")
@@ -302,29 +366,72 @@ with tab_chat:
             message_placeholder = st.empty()
             status_placeholder = st.empty()
             
-            # Animated status
+            # Live status: node events and LLM tokens are rendered as they arrive
             with status_placeholder:
-                with st.status("🧠 Processing...", expanded=True) as status:
-                    st.write("🎯 Intake Agent analyzing request...")
-                    time.sleep(0.3)
-                    st.write("🔀 Routing to specialist agent...")
-                    time.sleep(0.3)
-                    st.write("⚡ Executing...")
-                    
+                with st.status("🎯 Intake Agent analyzing request...", expanded=True) as status:
                     start_time = time.time()
+                    first_output = None
                     
                     profile = USER_PROFILES[st.session_state.user_profile]
+                    # Bounded window: older turns are carried by the rolling summary, so the
+                    # window reaches back to the first message the summary doesn't cover yet
+                    summary = st.session_state.summary
+                    start = max(0, min(len(st.session_state.messages) - CONTEXT_WINDOW, summary["messages"]))
                     initial_state = {
-                        "messages": st.session_state.messages, 
+                        "messages": st.session_state.messages[start:],
                         "user_id": profile["id"],
+                        "session_id": st.session_state.session_id,
+                        "conversation_summary": summary["text"],
+                        "summarized_messages": summary["messages"] - start,
                         "routing_path": [],
-                        "audit_log": st.session_state.audit_log
+                        "audit_log": []
                     }
                     
                     try:
-                        result = graph_app.invoke(initial_state)
+                        result = dict(initial_state)
+                        streamed = ""
+                        # Runs on the shared executor; this thread only renders events
+                        job = scheduler.submit(
+                            lambda state=initial_state: graph_app.stream(state, stream_mode=["updates", "messages"])
+                        )
+                        while True:
+                            try:
+                                event = job.events.get(timeout=0.25)
+                            except queue.Empty:
+                                position = scheduler.position(job)
+                                if position:
+                                    status.update(label=f"⏳ Queued - position {position} of {scheduler.stats()['pending']}")
+                                continue
+                            if event is DONE:
+                                job.future.result()  # re-raise worker errors
+                                break
+                            
+                            mode, chunk = event
+                            if mode == "messages":
+                                token, meta = chunk
+                                # Only user-facing chains stream (not JSON classification/tool picks)
+                                if "user_facing" in meta.get("tags", []) and token.content:
+                                    first_output = first_output or time.time()
+                                    streamed += token.content
+                                    message_placeholder.markdown(streamed + "▌")
+                                continue
+                            
+                            for node, update in chunk.items():
+                                merge_update(result, update)
+                                st.write(NODE_STATUS.get(node, f"✅ {node} finished"))
+                                if node == "intake":
+                                    status.update(label=f"🔀 Routing to {result.get('next_agent', 'specialist agent')}...")
+                                if (update or {}).get("messages"):
+                                    first_output = first_output or time.time()
+                                    message_placeholder.markdown(update["messages"][-1]["content"])
+                        
                         response = result['messages'][-1]['content']
                         duration = time.time() - start_time
+                        if "summarized_messages" in result:
+                            st.session_state.summary = {
+                                "text": result.get("conversation_summary", ""),
+                                "messages": start + result["summarized_messages"]
+                            }
                         
                         st.write("✅ Complete!")
                         status.update(label="✅ Done!", state="complete")
@@ -339,17 +446,20 @@ with tab_chat:
             
             # Update metrics
             st.session_state.metrics["total_requests"] += 1
-            st.session_state.metrics["response_times"].append(duration)
+            st.session_state.metrics["response_times"].add(duration)
             
             routing_path = result.get("routing_path", [])
             for agent in routing_path:
                 st.session_state.metrics["agent_distribution"][agent] += 1
             
-            if "Escalation" in routing_path:
+            escalated = "Escalation" in routing_path
+            if escalated:
                 st.session_state.metrics["escalated"] += 1
+            st.session_state.metrics["escalation_rate"].add(escalated)
+            st.session_state.metrics["automation_rate"].add(not escalated)
             
             confidence = result.get("confidence", 0.5)
-            st.session_state.metrics["confidence_scores"].append(confidence)
+            st.session_state.metrics["confidence_scores"].add(confidence)
             
             # Check for pending approvals
             if result.get("requires_approval"):
@@ -361,10 +471,6 @@ with tab_chat:
                 })
                 st.session_state.metrics["approvals_pending"] += 1
             
-            # Update audit log
-            if result.get("audit_log"):
-                st.session_state.audit_log = result["audit_log"]
-            
             st.session_state.last_result = result
             
             # Display response
@@ -374,17 +480,18 @@ with tab_chat:
             if debug_mode and routing_path:
                 st.caption(f"🔀 {' → '.join(routing_path)} → END")
             
-            st.caption(f"⏱️ {duration:.2f}s | 🤖 Gemini 2.5 Flash Lite")
+            ttft = f" (first output {first_output - start_time:.2f}s)" if first_output else ""
+            st.caption(f"⏱️ {duration:.2f}s{ttft} | 🤖 Gemini 2.5 Flash Lite")
             
             # Feedback buttons
             col1, col2, col3 = st.columns([1, 1, 8])
             with col1:
                 if st.button("👍", key=f"up_{len(st.session_state.messages)}"):
-                    st.session_state.metrics["satisfaction_scores"].append(1)
+                    st.session_state.metrics["satisfaction_scores"].add(True)
                     st.toast("Thanks! 👍")
             with col2:
                 if st.button("👎", key=f"down_{len(st.session_state.messages)}"):
-                    st.session_state.metrics["satisfaction_scores"].append(0)
+                    st.session_state.metrics["satisfaction_scores"].add(False)
                     st.toast("We'll improve! 👎")
             
             st.session_state.messages.append({"role": "assistant", "content": response})
@@ -6,10 +6,14 @@ If Jira auth fails, it falls back to demo mode automatically.
 """
 
 import os
+import asyncio
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
 from datetime import datetime
-from typing import Optional, Dict, List
+from typing import Callable, Optional, Dict, List
 import random
 
 # Configuration - will be loaded from Streamlit secrets or env
@@ -17,54 +21,256 @@ JIRA_DOMAIN = os.environ.get("JIRA_DOMAIN", "")
 JIRA_EMAIL = os.environ.get("JIRA_EMAIL", "")
 JIRA_API_TOKEN = os.environ.get("JIRA_API_TOKEN", "")
 
+# Connection pool size (concurrent keep-alive connections to Jira) and
+# how long project/priority metadata is cached
+JIRA_POOL_SIZE = int(os.environ.get("JIRA_POOL_SIZE", 10))
+JIRA_METADATA_TTL = float(os.environ.get("JIRA_METADATA_TTL", 300))  # seconds
+
+# Retries (idempotent calls only) and circuit breaker
+JIRA_MAX_RETRIES = int(os.environ.get("JIRA_MAX_RETRIES", 3))
+JIRA_BACKOFF_BASE = float(os.environ.get("JIRA_BACKOFF_BASE", 0.25))  # seconds
+JIRA_BACKOFF_MAX = float(os.environ.get("JIRA_BACKOFF_MAX", 4.0))     # seconds
+JIRA_BREAKER_THRESHOLD = int(os.environ.get("JIRA_BREAKER_THRESHOLD", 5))  # consecutive failures
+JIRA_BREAKER_COOLDOWN = float(os.environ.get("JIRA_BREAKER_COOLDOWN", 30))  # seconds between re-probes
+RETRYABLE_STATUS = {429, 502, 503, 504}
+
+TICKET_LABELS = ["ai-support", "it-support-genius"]
+
+# Jira Cloud accepts at most 50 issues per bulk-create request
+JIRA_BULK_LIMIT = 50
+
+DEMO_PRIORITIES = ["Highest", "High", "Medium", "Low", "Lowest"]
+
 # Demo mode storage
 DEMO_TICKETS = {}
 
+class JiraUnavailable(Exception):
+    """Raised without touching the network while the circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failures. While open, calls fail fast
+    and a background thread re-probes every `cooldown` seconds; the breaker
+    closes again on the first successful probe.
+    """
+    
+    def __init__(self, probe: Callable[[], bool], threshold: int = JIRA_BREAKER_THRESHOLD, cooldown: float = JIRA_BREAKER_COOLDOWN):
+        self.probe = probe
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.is_open = False
+        self._lock = threading.Lock()
+    
+    def allow(self) -> bool:
+        return not self.is_open
+    
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+    
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.is_open or self.failures < self.threshold:
+                return
+        self.trip()
+    
+    def trip(self):
+        """Open the breaker and start re-probing in the background"""
+        with self._lock:
+            if self.is_open:
+                return
+            self.is_open = True
+        print(f"[Jira] Circuit open - failing fast, re-probing every {self.cooldown:.0f}s")
+        threading.Thread(target=self._reprobe, name="jira-reprobe", daemon=True).start()
+    
+    def _reprobe(self):
+        while True:
+            time.sleep(self.cooldown)
+            try:
+                healthy = self.probe()
+            except Exception:
+                healthy = False
+            if healthy:
+                with self._lock:
+                    self.is_open = False
+                    self.failures = 0
+                print("[Jira] Circuit closed - Jira is reachable again")
+                return
+
+
 class JiraClient:
     """
     Jira Cloud REST API client with demo fallback.
+    All calls share one pooled keep-alive session, so TLS handshakes are paid
+    once per connection rather than once per request.
     """
     
-    def __init__(self, domain: str = None, email: str = None, api_token: str = None):
+    def __init__(
+        self,
+        domain: str = None,
+        email: str = None,
+        api_token: str = None,
+        pool_size: int = JIRA_POOL_SIZE,
+        base_url: str = None
+    ):
         self.domain = domain or JIRA_DOMAIN
         self.email = email or JIRA_EMAIL
         self.api_token = api_token or JIRA_API_TOKEN
-        self.base_url = f"https://{self.domain}/rest/api/3" if self.domain else ""
+        # base_url overrides the https://<domain> API root (proxies, local stub servers)
+        self.base_url = base_url or (f"https://{self.domain}/rest/api/3" if self.domain else "")
         self.auth = HTTPBasicAuth(self.email, self.api_token) if self.email and self.api_token else None
         self.headers = {
             "Accept": "application/json",
             "Content-Type": "application/json"
         }
+        
+        self.session = requests.Session()
+        self.session.auth = self.auth
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        
+        self._metadata = {}  # name -> (expires_at, value)
+        self._stats = {}     # endpoint -> counters
+        self._lock = threading.Lock()
+        self.breaker = CircuitBreaker(probe=lambda: self._probe().get("success", False))
+        
         self.demo_mode = False
+        self.probing = False
         self._check_mode()
     
+    def _request(
+        self,
+        method: str,
+        endpoint: str,
+        path: str,
+        timeout: float = 5,
+        idempotent: bool = False,
+        **kwargs
+    ) -> requests.Response:
+        """
+        Send a request through the circuit breaker. Idempotent calls are
+        retried on connection errors and 429/5xx responses with jittered
+        exponential backoff; others are sent once.
+        Raises JiraUnavailable while the breaker is open.
+        """
+        if not self.breaker.allow():
+            raise JiraUnavailable("Jira circuit is open")
+        
+        attempts = 1 + (JIRA_MAX_RETRIES if idempotent else 0)
+        for attempt in range(attempts):
+            retry_after = None
+            try:
+                response = self._send(method, endpoint, path, timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                self.breaker.record_failure()
+                if attempt == attempts - 1 or not self.breaker.allow():
+                    raise
+            else:
+                if response.status_code < 500 and response.status_code != 429:
+                    self.breaker.record_success()
+                    return response
+                if response.status_code >= 500:
+                    self.breaker.record_failure()
+                if response.status_code not in RETRYABLE_STATUS or attempt == attempts - 1 or not self.breaker.allow():
+                    return response
+                retry_after = response.headers.get("Retry-After")
+            
+            # Full jitter, capped; honour Retry-After from rate limiting
+            delay = random.uniform(0, min(JIRA_BACKOFF_MAX, JIRA_BACKOFF_BASE * 2 ** attempt))
+            if retry_after and retry_after.isdigit():
+                delay = min(float(retry_after), JIRA_BACKOFF_MAX)
+            time.sleep(delay)
+    
+    def _send(self, method: str, endpoint: str, path: str, timeout: float = 5, **kwargs) -> requests.Response:
+        """
+        Send one request over the pooled session and record its latency under
+        `endpoint` (a route template such as "GET /issue/{key}").
+        """
+        started = time.perf_counter()
+        error = False
+        try:
+            return self.session.request(method, f"{self.base_url}{path}", timeout=timeout, **kwargs)
+        except Exception:
+            error = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                s = self._stats.setdefault(endpoint, {"calls": 0, "errors": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+                s["calls"] += 1
+                s["errors"] += error
+                s["total_seconds"] += elapsed
+                s["max_seconds"] = max(s["max_seconds"], elapsed)
+    
+    def _cached(self, name: str, loader: Callable[[], Optional[object]]):
+        """Return cached metadata, reloading after JIRA_METADATA_TTL. `None` results are not cached."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._metadata.get(name)
+            if entry and entry[0] > now:
+                return entry[1]
+        value = loader()
+        if value is not None:
+            with self._lock:
+                self._metadata[name] = (now + JIRA_METADATA_TTL, value)
+        return value
+    
+    def clear_metadata_cache(self):
+        with self._lock:
+            self._metadata.clear()
+    
+    def get_stats(self) -> Dict:
+        """Per-endpoint call counts and latencies (ms)"""
+        with self._lock:
+            return {
+                endpoint: {
+                    "calls": s["calls"],
+                    "errors": s["errors"],
+                    "avg_ms": round(1000 * s["total_seconds"] / s["calls"], 1) if s["calls"] else 0.0,
+                    "max_ms": round(1000 * s["max_seconds"], 1)
+                }
+                for endpoint, s in self._stats.items()
+            }
+    
+    def close(self):
+        self.session.close()
+    
     def _check_mode(self):
-        """Check if we can use real Jira or need demo mode"""
+        """Decide between real Jira and demo mode without blocking the caller"""
         if not self.domain or not self.api_token:
             print("[Jira] No credentials - using demo mode")
             self.demo_mode = True
             return
         
-        # Try to connect
-        result = self.test_connection()
-        if not result.get("success"):
+        # Probe in the background; calls made meanwhile go to Jira as usual
+        self.probing = True
+        threading.Thread(target=self._initial_probe, name="jira-probe", daemon=True).start()
+    
+    def _initial_probe(self):
+        result = self._probe()
+        self.probing = False
+        if result.get("success"):
+            print(f"[Jira] Connected as {result.get('user')}")
+        elif result.get("status") in (401, 403):
+            # Bad credentials will not fix themselves
             print(f"[Jira] Auth failed - using demo mode: {result.get('error', 'Unknown')}")
             self.demo_mode = True
         else:
-            print(f"[Jira] Connected as {result.get('user')}")
+            # Jira unreachable: fail fast and keep re-probing
+            print(f"[Jira] Unreachable: {result.get('error', 'Unknown')}")
+            self.breaker.trip()
     
-    def test_connection(self) -> Dict:
-        """Test the Jira connection and return user info"""
+    def _probe(self) -> Dict:
+        """Single /myself call that bypasses retries and the breaker"""
         if not self.base_url or not self.auth:
             return {"success": False, "error": "No credentials configured"}
-        
         try:
-            response = requests.get(
-                f"{self.base_url}/myself",
-                headers=self.headers,
-                auth=self.auth,
-                timeout=5
-            )
+            response = self._send("GET", "GET /myself", "/myself", timeout=5)
             if response.status_code == 200:
                 user = response.json()
                 return {
@@ -72,28 +278,87 @@ class JiraClient:
                     "user": user.get("displayName"),
                     "email": user.get("emailAddress")
                 }
-            else:
-                return {"success": False, "error": f"Status {response.status_code}"}
+            return {"success": False, "status": response.status_code, "error": f"Status {response.status_code}"}
         except Exception as e:
             return {"success": False, "error": str(e)}
     
+    @property
+    def status(self) -> str:
+        """demo, connecting, degraded (circuit open) or live"""
+        if self.demo_mode:
+            return "demo"
+        if self.probing:
+            return "connecting"
+        return "degraded" if self.breaker.is_open else "live"
+    
+    def test_connection(self) -> Dict:
+        """Test the Jira connection and return user info"""
+        return self._probe()
+    
     def get_projects(self) -> List[Dict]:
-        """Get available Jira projects"""
+        """Get available Jira projects (cached for JIRA_METADATA_TTL)"""
         if self.demo_mode:
             return [{"key": "IT", "name": "IT Support", "id": "demo-1"}]
         
-        try:
-            response = requests.get(
-                f"{self.base_url}/project",
-                headers=self.headers,
-                auth=self.auth,
-                timeout=5
-            )
-            if response.status_code == 200:
-                return [{"key": p["key"], "name": p["name"], "id": p["id"]} for p in response.json()]
-            return [{"key": "IT", "name": "IT Support (Default)", "id": "default"}]
-        except:
-            return [{"key": "IT", "name": "IT Support (Default)", "id": "default"}]
+        def load():
+            try:
+                response = self._request("GET", "GET /project", "/project", timeout=5, idempotent=True)
+                if response.status_code == 200:
+                    return [{"key": p["key"], "name": p["name"], "id": p["id"]} for p in response.json()]
+            except Exception:
+                pass
+            return None
+        
+        return self._cached("projects", load) or [{"key": "IT", "name": "IT Support (Default)", "id": "default"}]
+    
+    def get_priorities(self) -> List[str]:
+        """Get the priority names configured in Jira (cached for JIRA_METADATA_TTL)"""
+        if self.demo_mode:
+            return list(DEMO_PRIORITIES)
+        
+        def load():
+            try:
+                response = self._request("GET", "GET /priority", "/priority", timeout=5, idempotent=True)
+                if response.status_code == 200:
+                    return [p["name"] for p in response.json()]
+            except Exception:
+                pass
+            return None
+        
+        return self._cached("priorities", load) or list(DEMO_PRIORITIES)
+    
+    def _issue_payload(
+        self,
+        project_key: str,
+        summary: str,
+        description: str,
+        issue_type: str = "Task",
+        priority: str = "Medium",
+        labels: List[str] = None
+    ) -> Dict:
+        """Build the REST payload for one issue"""
+        priority_map = {"Low": "Low", "Medium": "Medium", "High": "High", 
+                        "Critical": "Highest", "Critical (VIP)": "Highest"}
+        
+        priority_name = priority_map.get(priority, "Medium")
+        if priority_name not in self.get_priorities():
+            priority_name = "Medium"
+        
+        payload = {
+            "fields": {
+                "project": {"key": project_key},
+                "summary": summary,
+                "description": {
+                    "type": "doc", "version": 1,
+                    "content": [{"type": "paragraph", "content": [{"type": "text", "text": description}]}]
+                },
+                "issuetype": {"name": issue_type},
+                "priority": {"name": priority_name}
+            }
+        }
+        if labels:
+            payload["fields"]["labels"] = labels
+        return payload
     
     def create_issue(
         self,
@@ -127,32 +392,10 @@ class JiraClient:
             }
         
         # Real Jira
-        priority_map = {"Low": "Low", "Medium": "Medium", "High": "High", 
-                        "Critical": "Highest", "Critical (VIP)": "Highest"}
-        
-        payload = {
-            "fields": {
-                "project": {"key": project_key},
-                "summary": summary,
-                "description": {
-                    "type": "doc", "version": 1,
-                    "content": [{"type": "paragraph", "content": [{"type": "text", "text": description}]}]
-                },
-                "issuetype": {"name": issue_type},
-                "priority": {"name": priority_map.get(priority, "Medium")}
-            }
-        }
-        if labels:
-            payload["fields"]["labels"] = labels
+        payload = self._issue_payload(project_key, summary, description, issue_type, priority, labels)
         
         try:
-            response = requests.post(
-                f"{self.base_url}/issue",
-                json=payload,
-                headers=self.headers,
-                auth=self.auth,
-                timeout=10
-            )
+            response = self._request("POST", "POST /issue", "/issue", json=payload, timeout=10)
             if response.status_code in [200, 201]:
                 issue = response.json()
                 return {
@@ -165,6 +408,53 @@ class JiraClient:
         except Exception as e:
             return {"success": False, "error": str(e)}
     
+    def create_issues_bulk(self, project_key: str, issues: List[Dict], labels: List[str] = None) -> List[Dict]:
+        """
+        Create several issues with one call to the bulk endpoint (at most
+        JIRA_BULK_LIMIT per request). `issues` holds create_issue keyword
+        arguments (summary, description, priority, issue_type); the results
+        are returned in the same order.
+        """
+        if self.demo_mode:
+            return [self.create_issue(project_key=project_key, labels=labels, **issue) for issue in issues]
+        
+        results = []
+        for start in range(0, len(issues), JIRA_BULK_LIMIT):
+            chunk = issues[start:start + JIRA_BULK_LIMIT]
+            payload = {"issueUpdates": [self._issue_payload(project_key, labels=labels, **issue) for issue in chunk]}
+            try:
+                response = self._request("POST", "POST /issue/bulk", "/issue/bulk", json=payload, timeout=30)
+                if response.status_code not in [200, 201]:
+                    error = f"Status {response.status_code}: {response.text[:200]}"
+                    results.extend({"success": False, "error": error} for _ in chunk)
+                    continue
+                body = response.json()
+            except Exception as e:
+                results.extend({"success": False, "error": str(e)} for _ in chunk)
+                continue
+            
+            # Created issues come back in request order, minus the failed elements
+            failed = {
+                err.get("failedElementNumber"): str(err.get("elementErrors", {}).get("errors") or err)
+                for err in body.get("errors", [])
+            }
+            created = iter(body.get("issues", []))
+            for i in range(len(chunk)):
+                if i in failed:
+                    results.append({"success": False, "error": failed[i]})
+                    continue
+                issue = next(created, None)
+                if issue is None:
+                    results.append({"success": False, "error": "Missing from bulk response"})
+                    continue
+                results.append({
+                    "success": True,
+                    "key": issue["key"],
+                    "id": issue["id"],
+                    "url": f"https://{self.domain}/browse/{issue['key']}"
+                })
+        return results
+    
     def get_issue(self, issue_key: str) -> Dict:
         """Get issue details"""
         if self.demo_mode:
@@ -174,12 +464,7 @@ class JiraClient:
             return {"success": False, "error": "Ticket not found"}
         
         try:
-            response = requests.get(
-                f"{self.base_url}/issue/{issue_key}",
-                headers=self.headers,
-                auth=self.auth,
-                timeout=5
-            )
+            response = self._request("GET", "GET /issue/{key}", f"/issue/{issue_key}", timeout=5, idempotent=True)
             if response.status_code == 200:
                 issue = response.json()
                 fields = issue.get("fields", {})
@@ -210,6 +495,8 @@ def get_jira_client() -> JiraClient:
 def reset_jira_client():
     """Reset the client (for credential changes)"""
     global _jira_client
+    if _jira_client is not None:
+        _jira_client.close()
     _jira_client = None
 
 
@@ -217,7 +504,7 @@ def reset_jira_client():
 def jira_create_ticket(summary: str, description: str, priority: str = "Medium") -> str:
     """Create a ticket and return formatted result"""
     client = get_jira_client()
-    projects = client.get_projects()
+    projects = client.get_projects()  # cached, not a round-trip per ticket
     project_key = projects[0]["key"] if projects else "IT"
     
     result = client.create_issue(
@@ -225,7 +512,7 @@ def jira_create_ticket(summary: str, description: str, priority: str = "Medium")
         summary=summary,
         description=description,
         priority=priority,
-        labels=["ai-support", "it-support-genius"]
+        labels=TICKET_LABELS
     )
     
     if result["success"]:
@@ -234,6 +521,11 @@ def jira_create_ticket(summary: str, description: str, priority: str = "Medium")
     return f"❌ Error: {result.get('error', 'Unknown')}"
 
 
+async def ajira_create_ticket(summary: str, description: str, priority: str = "Medium") -> str:
+    """Async variant of jira_create_ticket; the HTTP call runs in a worker thread"""
+    return await asyncio.to_thread(jira_create_ticket, summary, description, priority)
+
+
 def jira_get_ticket(ticket_key: str) -> str:
     """Get ticket info"""
     client = get_jira_client()
@@ -256,7 +548,7 @@ def is_demo_mode() -> bool:
 if __name__ == "__main__":
     print("Testing Jira Integration...")
     client = JiraClient()
-    print(f"Mode: {'Demo' if client.demo_mode else 'Live'}")
+    print(f"Mode: {client.status}")
     
     # Test create
     result = jira_create_ticket(
@@ -0,0 +1,270 @@
+"""
+Write-Behind Ticket Queue
+
+Escalations get a provisional reference immediately; a background worker
+creates the real Jira issues in batches through the bulk-create endpoint and
+reports each provisional -> Jira key mapping to the audit log. User-facing
+latency therefore no longer depends on Jira.
+
+Every ticket is written to a local SQLite outbox (TICKET_QUEUE_PATH) before
+its reference is handed out and removed once Jira has answered for it.
+Each row is leased to the process that sends it; the lease is renewed while
+that process runs. Rows released at shutdown (e.g. because Jira was down) or
+whose lease expired (the owner crashed) are claimed by the next queue that
+looks - so several processes can share one outbox without sending a ticket
+twice.
+"""
+
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from integrations.jira_client import get_jira_client, TICKET_LABELS
+from state import AuditLogger
+
+TICKET_QUEUE_PATH = os.environ.get("TICKET_QUEUE_PATH", "./ticket_queue.db")
+TICKET_BATCH_SIZE = int(os.environ.get("TICKET_BATCH_SIZE", 20))
+TICKET_FLUSH_INTERVAL = float(os.environ.get("TICKET_FLUSH_INTERVAL", 2.0))  # seconds
+TICKET_LEASE_SECONDS = float(os.environ.get("TICKET_LEASE_SECONDS", 300))  # outbox rows owned per renewal
+TICKET_RESOLVED_SIZE = 1000  # reconciled references kept for lookups
+
+
+class TicketQueue:
+    """
+    Batches ticket creation on a background thread, backed by a SQLite outbox.
+    """
+
+    def __init__(
+        self,
+        path: str = TICKET_QUEUE_PATH,
+        batch_size: int = TICKET_BATCH_SIZE,
+        flush_interval: float = TICKET_FLUSH_INTERVAL
+    ):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[Optional[dict]]" = queue.Queue()
+        self._resolved = OrderedDict()  # provisional ref -> Jira result
+        self._stats = {"queued": 0, "created": 0, "failed": 0, "batches": 0, "replayed": 0}
+        self._lock = threading.Lock()
+        self.owner = uuid.uuid4().hex  # lease holder id of this queue
+        self._owned = set()            # refs this queue has taken responsibility for
+
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS tickets ("
+            "ref TEXT PRIMARY KEY, user_id TEXT, session_id TEXT, issue TEXT, created TEXT, "
+            "owner TEXT, lease_until REAL)"
+        )
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(tickets)")}
+        for column, kind in (("owner", "TEXT"), ("lease_until", "REAL")):
+            if column not in columns:
+                self._db.execute(f"ALTER TABLE tickets ADD COLUMN {column} {kind}")
+        self._db.commit()
+
+        # Tickets left over from a previous run go out first
+        self._renew_and_claim()
+
+        self._worker = threading.Thread(target=self._run, name="ticket-queue", daemon=True)
+        self._worker.start()
+
+    def submit(
+        self,
+        summary: str,
+        description: str,
+        priority: str = "Medium",
+        user_id: str = "unknown",
+        session_id: str = None
+    ) -> str:
+        """Persist a ticket, queue it and return its provisional reference"""
+        item = {
+            "ref": f"ESC-{uuid.uuid4().hex[:8].upper()}",
+            "user_id": user_id,
+            "session_id": session_id,
+            "issue": {"summary": summary, "description": description, "priority": priority}
+        }
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO tickets (ref, user_id, session_id, issue, created, owner, lease_until) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (item["ref"], user_id, session_id, json.dumps(item["issue"]), datetime.now().isoformat(),
+                 self.owner, time.time() + TICKET_LEASE_SECONDS)
+            )
+            self._db.commit()
+            self._owned.add(item["ref"])
+            self._stats["queued"] += 1
+        self._queue.put(item)
+        return item["ref"]
+
+    def _renew_and_claim(self):
+        """
+        Extend the lease on our rows and take over rows nobody holds (released
+        at shutdown, or their owner's lease expired). The UPDATE is a single
+        statement, so two processes never claim the same row.
+        """
+        now = time.time()
+        with self._lock:
+            with self._db:
+                self._db.execute(
+                    "UPDATE tickets SET owner = ?, lease_until = ? "
+                    "WHERE owner = ? OR owner IS NULL OR lease_until IS NULL OR lease_until < ?",
+                    (self.owner, now + TICKET_LEASE_SECONDS, self.owner, now)
+                )
+            rows = self._db.execute(
+                "SELECT ref, user_id, session_id, issue FROM tickets WHERE owner = ? ORDER BY created", (self.owner,)
+            ).fetchall()
+            claimed = [row for row in rows if row[0] not in self._owned]
+            self._owned.update(row[0] for row in claimed)
+            self._stats["replayed"] += len(claimed)
+        for ref, user_id, session_id, issue in claimed:
+            self._queue.put({"ref": ref, "user_id": user_id, "session_id": session_id, "issue": json.loads(issue)})
+        if claimed:
+            print(f"[Tickets] Took over {len(claimed)} ticket(s) left in the outbox")
+
+    def _run(self):
+        batch: List[dict] = []
+        deadline = time.monotonic() + self.flush_interval
+        renew_at = time.monotonic() + TICKET_LEASE_SECONDS / 3
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = ...
+            if item is None:  # close()
+                if batch and not self._flush(batch):
+                    print(f"[Tickets] Jira unavailable - {len(batch)} ticket(s) released for the next start")
+                self._release()
+                self._queue.task_done()
+                break
+            if time.monotonic() >= renew_at:
+                self._renew_and_claim()
+                renew_at = time.monotonic() + TICKET_LEASE_SECONDS / 3
+            if item is not ...:
+                batch.append(item)
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                self._flush(batch)
+                deadline = time.monotonic() + self.flush_interval
+
+    def _flush(self, batch: List[dict]) -> bool:
+        """
+        Send a batch, removing every ticket Jira answered for. Tickets are
+        kept in `batch` (and in the outbox) while Jira is down; returns False
+        if any were kept.
+        """
+        if not batch:
+            return True
+        client = get_jira_client()
+        if getattr(client, "status", "") == "degraded":
+            return False  # keep them until the circuit closes
+        try:
+            projects = client.get_projects()
+            project_key = projects[0]["key"] if projects else "IT"
+            results = client.create_issues_bulk(project_key, [item["issue"] for item in batch], labels=TICKET_LABELS)
+        except Exception as e:
+            results = [{"success": False, "error": str(e)} for _ in batch]
+
+        # A failure caused by the circuit opening mid-batch is retried, not reported
+        down = getattr(client, "status", "") == "degraded"
+        held = []
+        for item, result in zip(batch, results):
+            if not result.get("success") and down:
+                held.append(item)
+            else:
+                self._reconcile(item, result)
+                self._queue.task_done()
+        with self._lock:
+            self._stats["batches"] += 1
+        batch[:] = held
+        return not held
+
+    def _reconcile(self, item: dict, result: Dict):
+        with self._lock:
+            self._db.execute("DELETE FROM tickets WHERE ref = ?", (item["ref"],))
+            self._db.commit()
+            self._owned.discard(item["ref"])
+            self._resolved[item["ref"]] = result
+            if len(self._resolved) > TICKET_RESOLVED_SIZE:
+                self._resolved.popitem(last=False)
+            self._stats["created" if result.get("success") else "failed"] += 1
+
+        if result.get("success"):
+            print(f"[Tickets] {item['ref']} -> {result['key']}")
+            AuditLogger.log(item, "TicketQueue", "ticket_reconciled", {
+                "provisional": item["ref"],
+                "key": result["key"],
+                "url": result.get("url"),
+                "demo": result.get("demo", False)
+            })
+        else:
+            print(f"[Tickets] {item['ref']} failed: {result.get('error')}")
+            AuditLogger.log(item, "TicketQueue", "ticket_failed", {
+                "provisional": item["ref"],
+                "error": result.get("error", "Unknown")
+            })
+
+    def resolve(self, ref: str) -> Optional[Dict]:
+        """Jira result for a provisional reference, or None while it is still queued"""
+        with self._lock:
+            return self._resolved.get(ref)
+
+    def flush(self):
+        """Block until every queued ticket has been sent (waits for the circuit to close while Jira is down)"""
+        self._queue.join()
+
+    def _release(self):
+        """Give up the lease on unsent rows so another queue can claim them right away"""
+        with self._lock:
+            self._db.execute("UPDATE tickets SET owner = NULL, lease_until = NULL WHERE owner = ?", (self.owner,))
+            self._db.commit()
+            self._owned.clear()
+
+    def close(self):
+        """Send pending tickets (unless Jira is down - they are released in the outbox) and stop the worker"""
+        if self._worker.is_alive():
+            self._queue.put(None)
+            self._worker.join()
+        with self._lock:
+            self._db.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["pending"] = stats["queued"] + stats["replayed"] - stats["created"] - stats["failed"]
+        return stats
+
+
+# Singleton
+_ticket_queue = None
+_ticket_queue_lock = threading.Lock()
+
+def get_ticket_queue() -> TicketQueue:
+    """Get the process-wide ticket queue"""
+    global _ticket_queue
+    if _ticket_queue is None:
+        with _ticket_queue_lock:
+            if _ticket_queue is None:
+                _ticket_queue = TicketQueue()
+                atexit.register(_ticket_queue.close)
+    return _ticket_queue
+
+
+# Helper for agents
+def jira_enqueue_ticket(
+    summary: str,
+    description: str,
+    priority: str = "Medium",
+    user_id: str = "unknown",
+    session_id: str = None
+) -> str:
+    """Queue a ticket and return a formatted provisional reference"""
+    ref = get_ticket_queue().submit(summary, description, priority, user_id=user_id, session_id=session_id)
+    return f"🕒 Queued as `{ref}` (the Jira key will be posted to the audit log)"
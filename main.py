@@ -1,5 +1,6 @@
 import os
 from langgraph.graph import StateGraph, END
+from langchain_core.runnables import RunnableLambda
 from state import AgentState
 from agents.intake import IntakeAgent
 from agents.knowledge import KnowledgeAgent
@@ -15,40 +16,41 @@ escalation_agent = EscalationAgent()
 log_analysis_agent = LogAnalysisAgent()
 
 # Define Nodes with Routing Path Tracking
-def intake_node(state: AgentState):
-    result = intake_agent.run(state)
-    path = state.get("routing_path", [])
-    path.append("Intake")
-    result["routing_path"] = path
+# routing_path is append-only, so each node only emits its own step
+def _track(state: AgentState, result: dict, step: str):
+    result["routing_path"] = [step]
     return result
 
+def intake_node(state: AgentState):
+    return _track(state, intake_agent.run(state), "Intake")
+
 def knowledge_node(state: AgentState):
-    result = knowledge_agent.run(state)
-    path = state.get("routing_path", [])
-    path.append("Knowledge")
-    result["routing_path"] = path
-    return result
+    return _track(state, knowledge_agent.run(state), "Knowledge")
 
 def workflow_node(state: AgentState):
-    result = workflow_agent.run(state)
-    path = state.get("routing_path", [])
-    path.append("Workflow")
-    result["routing_path"] = path
-    return result
+    return _track(state, workflow_agent.run(state), "Workflow")
 
 def escalation_node(state: AgentState):
-    result = escalation_agent.run(state)
-    path = state.get("routing_path", [])
-    path.append("Escalation")
-    result["routing_path"] = path
-    return result
+    return _track(state, escalation_agent.run(state), "Escalation")
 
 def log_analysis_node(state: AgentState):
-    result = log_analysis_agent.run(state)
-    path = state.get("routing_path", [])
-    path.append("LogAnalysis")
-    result["routing_path"] = path
-    return result
+    return _track(state, log_analysis_agent.run(state), "LogAnalysis")
+
+# Async variants, used by app.ainvoke / app.astream
+async def aintake_node(state: AgentState):
+    return _track(state, await intake_agent.arun(state), "Intake")
+
+async def aknowledge_node(state: AgentState):
+    return _track(state, await knowledge_agent.arun(state), "Knowledge")
+
+async def aworkflow_node(state: AgentState):
+    return _track(state, await workflow_agent.arun(state), "Workflow")
+
+async def aescalation_node(state: AgentState):
+    return _track(state, await escalation_agent.arun(state), "Escalation")
+
+async def alog_analysis_node(state: AgentState):
+    return _track(state, await log_analysis_agent.arun(state), "LogAnalysis")
 
 # Define Routing Logic
 def route_intake(state: AgentState):
@@ -67,11 +69,13 @@ def route_intake(state: AgentState):
 # Build Graph
 workflow = StateGraph(AgentState)
 
-workflow.add_node("intake", intake_node)
-workflow.add_node("knowledge", knowledge_node)
-workflow.add_node("workflow", workflow_node)
-workflow.add_node("escalation", escalation_node)
-workflow.add_node("log_analysis", log_analysis_node)
+# Each node has a sync and an async implementation: app.invoke/stream use the
+# former, app.ainvoke/astream/abatch the latter on a single event loop
+workflow.add_node("intake", RunnableLambda(intake_node, afunc=aintake_node))
+workflow.add_node("knowledge", RunnableLambda(knowledge_node, afunc=aknowledge_node))
+workflow.add_node("workflow", RunnableLambda(workflow_node, afunc=aworkflow_node))
+workflow.add_node("escalation", RunnableLambda(escalation_node, afunc=aescalation_node))
+workflow.add_node("log_analysis", RunnableLambda(log_analysis_node, afunc=alog_analysis_node))
 
 workflow.set_entry_point("intake")
 
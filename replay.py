@@ -0,0 +1,188 @@
+"""
+Bulk Replay Runner for IT Support System
+
+Pushes a JSONL file of requests through the LangGraph pipeline concurrently
+and reports throughput and per-agent latency percentiles. Used to reprocess
+backlogs and to size the worker fleet.
+
+Input lines:  {"message": "...", "user_id": "..."}   (optional "id")
+Output lines: one result per request (response, routing path, latencies, error)
+
+Run with: python replay.py requests.jsonl -o results.jsonl --workers 8 [--processes]
+"""
+
+import argparse
+import json
+import math
+import multiprocessing.util
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Dict, List
+
+_app = None
+
+
+def _get_app():
+    # Imported lazily so each worker process builds its own graph once
+    global _app
+    if _app is None:
+        from main import app
+        _app = app
+    return _app
+
+
+def _close_sinks():
+    # Tickets first - reconciling them writes audit entries
+    from integrations import ticket_queue
+    from utils import audit
+    if ticket_queue._ticket_queue is not None:
+        ticket_queue._ticket_queue.close()
+    if audit._audit_sink is not None:
+        audit._audit_sink.close()
+
+
+def _init_worker():
+    # Pool workers leave through os._exit, which skips atexit; multiprocessing
+    # finalizers still run, so the write-behind sinks get flushed there
+    multiprocessing.util.Finalize(None, _close_sinks, exitpriority=10)
+
+
+def replay_one(index: int, record: dict) -> dict:
+    """Run one request through the graph, timing each node"""
+    state = {
+        "messages": [{"role": "user", "content": record["message"]}],
+        "user_id": record.get("user_id", "unknown_user"),
+        "routing_path": []
+    }
+    result = {
+        "index": index,
+        "id": record.get("id", index),
+        "user_id": state["user_id"],
+        "message": record["message"],
+        "response": None,
+        "routing_path": [],
+        "confidence": None,
+        "agent_latency": {},
+        "error": None
+    }
+
+    started = last = time.perf_counter()
+    try:
+        # "updates" mode yields once per finished node, so the gap between
+        # events is that node's latency
+        for event in _get_app().stream(state, stream_mode="updates"):
+            now = time.perf_counter()
+            for node, update in event.items():
+                result["agent_latency"][node] = round(now - last, 4)
+                update = update or {}
+                if update.get("messages"):
+                    result["response"] = update["messages"][-1]["content"]
+                # routing_path updates are deltas (one step per node)
+                result["routing_path"].extend(update.get("routing_path") or [])
+                if update.get("confidence") is not None:
+                    result["confidence"] = update["confidence"]
+            last = now
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["latency"] = round(time.perf_counter() - started, 4)
+    return result
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(results: List[dict], wall_seconds: float) -> dict:
+    """Throughput plus p50/p95/p99 latency overall and per agent"""
+    per_agent: Dict[str, List[float]] = {}
+    for r in results:
+        for node, seconds in r["agent_latency"].items():
+            per_agent.setdefault(node, []).append(seconds)
+
+    def stats(values):
+        return {
+            "count": len(values),
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "p99": percentile(values, 99)
+        }
+
+    return {
+        "requests": len(results),
+        "errors": sum(1 for r in results if r["error"]),
+        "wall_seconds": round(wall_seconds, 3),
+        "throughput_rps": round(len(results) / wall_seconds, 2) if wall_seconds > 0 else 0.0,
+        "latency": stats([r["latency"] for r in results]),
+        "agents": {node: stats(values) for node, values in sorted(per_agent.items())}
+    }
+
+
+def load_requests(path: str) -> List[dict]:
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if "message" not in record:
+                raise ValueError(f"{path}:{line_no}: missing 'message'")
+            records.append(record)
+    return records
+
+
+def run_replay(input_path: str, output_path: str, workers: int = 8, use_processes: bool = False) -> dict:
+    """Replay every request in `input_path`, write results to `output_path` and return the summary"""
+    records = load_requests(input_path)
+    if use_processes:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+    else:
+        pool = ThreadPoolExecutor(max_workers=workers)
+
+    results = []
+    started = time.perf_counter()
+    with pool, open(output_path, "w", encoding="utf-8") as out:
+        futures = [pool.submit(replay_one, i, record) for i, record in enumerate(records)]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            out.write(json.dumps(result) + "\n")
+    summary = summarize(results, time.perf_counter() - started)
+    return summary
+
+
+def print_summary(summary: dict):
+    print("=" * 60)
+    print(f"Requests: {summary['requests']} | Errors: {summary['errors']} | "
+          f"Wall: {summary['wall_seconds']}s | Throughput: {summary['throughput_rps']} req/s")
+    print("-" * 60)
+    print(f"{'Stage':<16}{'Count':>8}{'p50 (s)':>12}{'p95 (s)':>12}{'p99 (s)':>12}")
+    rows = [("end-to-end", summary["latency"])] + list(summary["agents"].items())
+    for name, s in rows:
+        print(f"{name:<16}{s['count']:>8}{s['p50']:>12.3f}{s['p95']:>12.3f}{s['p99']:>12.3f}")
+    print("=" * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay JSONL requests through the IT support graph")
+    parser.add_argument("input", help="JSONL file with one {message, user_id} object per line")
+    parser.add_argument("-o", "--output", default="replay_results.jsonl", help="Where to write JSONL results")
+    parser.add_argument("-w", "--workers", type=int, default=8, help="Pool size")
+    parser.add_argument("--processes", action="store_true", help="Use a process pool instead of threads")
+    parser.add_argument("--summary", help="Also write the summary as JSON to this path")
+    args = parser.parse_args()
+
+    summary = run_replay(args.input, args.output, workers=args.workers, use_processes=args.processes)
+    print_summary(summary)
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
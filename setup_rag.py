@@ -1,6 +1,12 @@
-from utils.rag import add_documents
+import re
+from utils.rag import ingest_documents, INGEST_BATCH_SIZE
 
-def main():
+def source_id(document: str) -> str:
+    """Stable source id from the article title (the text before the first colon)"""
+    title = document.split(":", 1)[0]
+    return re.sub(r"[^a-z0-9]+", "-", title.lower()).strip("-")
+
+def main(batch_size: int = INGEST_BATCH_SIZE):
     print("Initializing Knowledge Base...")
     
     documents = [
@@ -82,8 +88,12 @@ def main():
         "Network Best Practices: For reliable network: Restart device regularly, avoid unauthorized software, keep OS updated, use Ethernet for large meetings/presentations, report recurring issues promptly.",
     ]
     
-    add_documents(documents)
-    print(f"Added {len(documents)} documents to the knowledge base.")
+    # Stable ids make re-runs incremental: unchanged articles are not re-embedded.
+    # This list is the whole KB, so anything else in the store (removed articles,
+    # UUID-keyed chunks from older syncs) is pruned.
+    stats = ingest_documents([(source_id(doc), doc) for doc in documents], batch_size=batch_size, prune=True)
+    print(f"Synced {stats['documents']} documents ({stats['upserted']} chunks embedded, "
+          f"{stats['skipped']} unchanged, {stats['deleted']} removed) in {stats['seconds']}s.")
 
 if __name__ == "__main__":
     main()
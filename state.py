@@ -1,14 +1,18 @@
-from typing import TypedDict, List, Any, Optional
+import operator
+from typing import Annotated, TypedDict, List, Any, Optional
 from datetime import datetime
 
+from utils.audit import get_audit_sink
+
 class AgentState(TypedDict, total=False):
-    # Core state
-    messages: List[dict]
+    # Core state (append-only: nodes return only the entries they add)
+    messages: Annotated[List[dict], operator.add]
     user_id: str
+    session_id: str                  # UI session; scopes the audit trail
     next_agent: str
     
     # Routing & Analysis
-    routing_path: List[str]
+    routing_path: Annotated[List[str], operator.add]
     entities: dict
     sentiment: str
     urgency: str
@@ -19,31 +23,46 @@ class AgentState(TypedDict, total=False):
     requires_approval: bool          # Human-in-the-loop flag
     approval_action: str             # Action awaiting approval
     conversation_summary: str        # Multi-turn context summary
-    audit_log: List[dict]            # Action history
+    summarized_messages: int         # Leading `messages` already folded into the summary
+    audit_log: Annotated[List[dict], operator.add]  # Action history
     
     # Legacy
     current_context: dict
 
 
+# Fields merged with operator.add instead of being overwritten
+APPEND_FIELDS = ("messages", "routing_path", "audit_log")
+
+def merge_update(state: dict, update: dict) -> dict:
+    """Apply a node's update to a plain dict the same way the graph does"""
+    for key, value in (update or {}).items():
+        if key in APPEND_FIELDS and value:
+            state[key] = list(state.get(key) or []) + list(value)
+        elif key not in APPEND_FIELDS:
+            state[key] = value
+    return state
+
+
 class AuditLogger:
     """
     Centralized audit logging for all agent actions.
-    Provides transparency and traceability.
+    Provides transparency and traceability. Entries are also handed to the
+    persistent audit sink, which writes them in the background.
     """
     
     @staticmethod
     def log(state: AgentState, agent: str, action: str, details: dict = None) -> List[dict]:
-        """Add an entry to the audit log"""
-        log = state.get("audit_log", [])
+        """Record an entry and return it as an `audit_log` delta for the graph to append"""
         entry = {
             "timestamp": datetime.now().isoformat(),
             "agent": agent,
             "action": action,
             "user_id": state.get("user_id", "unknown"),
+            "session_id": state.get("session_id"),
             "details": details or {}
         }
-        log.append(entry)
-        return log
+        get_audit_sink().write(entry)
+        return [entry]
 
 
 # Actions that require human approval
@@ -0,0 +1,44 @@
+"""
+Log level statistics behind LogAnalysisAgent's severity.
+
+    python -m unittest test_log_columns
+"""
+
+import unittest
+
+import numpy as np
+
+from tools.log_columns import LEVELS, ERROR, LogStats
+
+
+def stats_for(minutes):
+    """LogStats from {minute epoch: (lines, errors)}"""
+    stats = LogStats()
+    stats.minutes = np.array(sorted(minutes), dtype=np.int64)
+    stats.minute_lines = np.array([minutes[m][0] for m in sorted(minutes)], dtype=np.int64)
+    stats.minute_errors = np.array([minutes[m][1] for m in sorted(minutes)], dtype=np.int64)
+    stats.levels[ERROR] = stats.minute_errors.sum()
+    stats.levels[LEVELS.index("INFO")] = stats.minute_lines.sum() - stats.levels[ERROR]
+    return stats
+
+
+class LogStatsTestCase(unittest.TestCase):
+
+    def test_quiet_minute_is_not_a_spike(self):
+        summary = stats_for({0: (1, 1), 60: (50, 2)}).summary(min_lines=10)
+        self.assertEqual(summary["errors"], 3)
+        self.assertAlmostEqual(summary["peak_error_rate"], 0.04)
+        self.assertEqual(summary["peak_minute"], 60)
+
+    def test_no_minute_with_enough_lines(self):
+        summary = stats_for({0: (1, 1), 60: (3, 1)}).summary(min_lines=10)
+        self.assertEqual(summary["peak_error_rate"], 0.0)
+        self.assertIsNone(summary["peak_minute"])
+
+    def test_busy_minute_spikes(self):
+        summary = stats_for({0: (40, 1), 60: (20, 10)}).summary(min_lines=10)
+        self.assertEqual((summary["peak_error_rate"], summary["peak_minute"]), (0.5, 60))
+
+
+if __name__ == "__main__":
+    unittest.main()
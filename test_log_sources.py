@@ -0,0 +1,40 @@
+"""
+Log file lookup for LogAnalysisAgent.
+
+    python -m unittest test_log_sources
+"""
+
+import os
+import tempfile
+import unittest
+
+from tools.log_sources import find_log_files
+
+
+class FindLogFilesTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.log_dir = tempfile.mkdtemp()
+        for name in ("al.log", "alice.log", "user_dev.log", "user_dev.log.1.gz", "user_dev2.log",
+                     "user_dev-old.log", "user_dev.log.gz"):
+            open(os.path.join(self.log_dir, name), "w").close()
+        os.mkdir(os.path.join(self.log_dir, "user_dev"))
+        open(os.path.join(self.log_dir, "user_dev", "app.log"), "w").close()
+
+    def names(self, user_id):
+        return [os.path.relpath(p, self.log_dir) for p in find_log_files(user_id, self.log_dir)]
+
+    def test_user_id_is_not_a_prefix_match(self):
+        self.assertEqual(self.names("al"), ["al.log"])
+        self.assertEqual(sorted(self.names("user_dev")), sorted([
+            os.path.join("user_dev", "app.log"), "user_dev.log", "user_dev.log.1.gz", "user_dev.log.gz"
+        ]))
+        self.assertEqual(self.names("user_d"), [])
+
+    def test_unsafe_user_ids_find_nothing(self):
+        for user_id in ("", "../user_dev", ".hidden", "user_*", "user_dev/.."):
+            self.assertEqual(self.names(user_id), [], user_id)
+
+
+if __name__ == "__main__":
+    unittest.main()
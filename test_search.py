@@ -0,0 +1,29 @@
+"""
+BM25 search used by the KnowledgeAgent.
+
+    python -m unittest test_search
+"""
+
+import unittest
+
+from utils.search import BM25Index, tokenize
+
+
+class SearchTestCase(unittest.TestCase):
+
+    def test_compounds_fold_into_one_term(self):
+        self.assertEqual(tokenize("How do I set up the VPN?"), ["setup", "vpn"])
+        self.assertEqual(tokenize("can't log  in"), ["t", "login"])
+        self.assertEqual(tokenize("sign-in page"), ["signin", "page"])
+        self.assertEqual(tokenize("pick up laptop"), ["pick", "up", "laptop"])
+
+    def test_setup_question_ranks_setup_article_first(self):
+        index = BM25Index.from_documents({
+            "vpn/setup": "vpn setup VPN Setup: Download GlobalProtect, install, and connect.",
+            "onboarding/first_day": "onboarding first day First Day: Pick up laptop from IT, set up MFA.",
+        })
+        self.assertEqual(index.search("How do I set up the VPN?", k=1)[0][0], "vpn/setup")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,180 @@
+"""
+Ticket queue and Jira bulk-create against a local stub Jira server.
+
+    python -m unittest test_ticket_queue
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("AUDIT_DB_PATH", os.path.join(_tmp, "audit.db"))
+
+from integrations.jira_client import JiraClient
+from integrations.ticket_queue import TicketQueue
+from utils.audit import get_audit_sink
+
+
+class StubJira(BaseHTTPRequestHandler):
+    """Minimal Jira REST API: /myself, /project and /issue/bulk"""
+
+    down = False        # answer every call with 503
+    bulk_calls = []     # summaries sent per /issue/bulk request
+    next_key = 1
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status: int, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if StubJira.down:
+            return self._reply(503, {})
+        if self.path.endswith("/myself"):
+            return self._reply(200, {"displayName": "Stub", "emailAddress": "stub@example.com"})
+        if self.path.endswith("/project"):
+            return self._reply(200, [{"key": "IT", "name": "IT Support", "id": "1"}])
+        self._reply(404, {})
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if StubJira.down:
+            return self._reply(503, {})
+        updates = payload["issueUpdates"]
+        StubJira.bulk_calls.append([u["fields"]["summary"] for u in updates])
+        issues, errors = [], []
+        for i, update in enumerate(updates):
+            if "FAIL" in update["fields"]["summary"]:
+                errors.append({"failedElementNumber": i, "status": 400,
+                               "elementErrors": {"errors": {"summary": "rejected"}}})
+            else:
+                issues.append({"id": str(StubJira.next_key), "key": f"IT-{StubJira.next_key}"})
+                StubJira.next_key += 1
+        self._reply(201, {"issues": issues, "errors": errors})
+
+
+def wait_for(condition, timeout: float = 10.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+class JiraStubTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubJira)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}/rest/api/3"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def setUp(self):
+        StubJira.down = False
+        StubJira.bulk_calls = []
+        self.client = JiraClient(domain="stub.example", email="bot@example.com", api_token="token", base_url=self.base_url)
+        self.client.breaker.cooldown = 0.1
+        self.assertTrue(wait_for(lambda: self.client.status == "live"))
+        patcher = mock.patch("integrations.ticket_queue.get_jira_client", return_value=self.client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.client.close)
+        self.db_path = os.path.join(tempfile.mkdtemp(dir=_tmp), "tickets.db")
+
+    def test_bulk_partial_failure_keeps_request_order(self):
+        results = self.client.create_issues_bulk("IT", [
+            {"summary": "first", "description": "a"},
+            {"summary": "FAIL second", "description": "b"},
+            {"summary": "third", "description": "c"},
+            {"summary": "FAIL fourth", "description": "d"},
+        ])
+        self.assertEqual([r["success"] for r in results], [True, False, True, False])
+        self.assertEqual(int(results[2]["key"].split("-")[1]), int(results[0]["key"].split("-")[1]) + 1)
+        self.assertIn("rejected", results[1]["error"])
+
+    def test_queue_reconciles_partial_batch(self):
+        tickets = TicketQueue(path=self.db_path, batch_size=3, flush_interval=0.1)
+        self.addCleanup(tickets.close)
+        refs = [tickets.submit(s, "details", session_id="s1") for s in ("ok 1", "FAIL 2", "ok 3")]
+        tickets.flush()
+
+        self.assertEqual(StubJira.bulk_calls, [["ok 1", "FAIL 2", "ok 3"]])
+        self.assertTrue(tickets.resolve(refs[0])["success"])
+        self.assertFalse(tickets.resolve(refs[1])["success"])
+        self.assertTrue(tickets.resolve(refs[2])["success"])
+        actions = [e["action"] for e in get_audit_sink().query(agent="TicketQueue", session_id="s1")]
+        self.assertEqual(sorted(actions), ["ticket_failed", "ticket_reconciled", "ticket_reconciled"])
+        self.assertEqual(tickets.stats()["pending"], 0)
+
+    def test_degraded_jira_holds_then_reconciles(self):
+        StubJira.down = True
+        self.client.breaker.trip()
+        tickets = TicketQueue(path=self.db_path, batch_size=10, flush_interval=0.1)
+        self.addCleanup(tickets.close)
+        ref = tickets.submit("VPN down", "details", session_id="s2")
+
+        time.sleep(0.5)  # several flush intervals while the circuit is open
+        self.assertEqual(StubJira.bulk_calls, [])
+        self.assertIsNone(tickets.resolve(ref))
+        self.assertEqual(tickets.stats()["pending"], 1)
+
+        StubJira.down = False  # next re-probe closes the circuit
+        self.assertTrue(wait_for(lambda: tickets.resolve(ref) is not None))
+        self.assertTrue(tickets.resolve(ref)["success"])
+        actions = [e["action"] for e in get_audit_sink().query(agent="TicketQueue", session_id="s2")]
+        self.assertEqual(actions, ["ticket_reconciled"])
+
+    def test_pending_tickets_survive_restart(self):
+        StubJira.down = True
+        self.client.breaker.trip()
+        first = TicketQueue(path=self.db_path, batch_size=10, flush_interval=0.1)
+        ref = first.submit("Printer on fire", "details")
+        first.close()  # Jira still down: the ticket stays in the outbox
+        self.assertEqual(StubJira.bulk_calls, [])
+
+        StubJira.down = False
+        self.assertTrue(wait_for(lambda: self.client.status == "live"))
+        second = TicketQueue(path=self.db_path, batch_size=10, flush_interval=0.1)
+        self.addCleanup(second.close)
+        self.assertEqual(second.stats()["replayed"], 1)
+        second.flush()
+        self.assertEqual(StubJira.bulk_calls, [["Printer on fire"]])
+        self.assertTrue(second.resolve(ref)["success"])
+
+    def test_shared_outbox_sends_each_ticket_once(self):
+        StubJira.down = True
+        self.client.breaker.trip()
+        first = TicketQueue(path=self.db_path, batch_size=10, flush_interval=0.1)
+        self.addCleanup(first.close)
+        ref = first.submit("Disk full", "details")
+
+        second = TicketQueue(path=self.db_path, batch_size=10, flush_interval=0.1)
+        self.addCleanup(second.close)
+        self.assertEqual(second.stats()["replayed"], 0)  # still leased by the first queue
+
+        StubJira.down = False
+        self.assertTrue(wait_for(lambda: first.resolve(ref) is not None))
+        second.flush()
+        self.assertEqual(StubJira.bulk_calls, [["Disk full"]])
+        self.assertIsNone(second.resolve(ref))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,159 @@
+"""
+Checkpointed Incremental Log Scanning
+
+Remembers, per log file, the inode and byte offset scanned so far together
+with the findings up to that point. A repeated check only scans the bytes
+appended since the last run and merges them into the cached findings, so
+its cost is proportional to the new data.
+
+A full rescan happens when the file was rotated (new inode), truncated,
+the signature set changed, or the source cannot seek (gzip, inline demo logs).
+The same pass extends the file's sparse timestamp index (tools.log_index)
+and its level/error aggregates (tools.log_columns.LogStats), which are stored
+with the checkpoint.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+from tools.log_columns import LogColumns, LogStats
+from tools.log_index import TimeIndex
+from tools.log_sources import LogSource
+from tools.signatures import ScanResult, SignatureEngine
+
+LOG_CHECKPOINT_PATH = os.environ.get("LOG_CHECKPOINT_PATH", "./log_checkpoints.db")
+
+# One lock per log file: the load -> scan -> save -> put sequence must not interleave
+_source_locks: Dict[str, threading.Lock] = {}
+_source_locks_guard = threading.Lock()
+
+
+def _source_lock(key: str) -> threading.Lock:
+    with _source_locks_guard:
+        return _source_locks.setdefault(key, threading.Lock())
+
+
+class CheckpointStore:
+    """
+    SQLite table of (source path -> inode, offset, next line, signature version, findings, stats).
+    """
+
+    def __init__(self, path: str = LOG_CHECKPOINT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoints ("
+            "source TEXT PRIMARY KEY, inode INTEGER, offset INTEGER, line INTEGER, "
+            "version TEXT, findings TEXT, stats TEXT, updated TEXT)"
+        )
+        if "stats" not in {row[1] for row in self._db.execute("PRAGMA table_info(checkpoints)")}:
+            self._db.execute("ALTER TABLE checkpoints ADD COLUMN stats TEXT")
+        self._db.commit()
+
+    def get(self, source: str) -> Optional[dict]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT inode, offset, line, version, findings, stats FROM checkpoints WHERE source = ?", (source,)
+            ).fetchone()
+        if row is None:
+            return None
+        inode, offset, line, version, findings, stats = row
+        return {
+            "inode": inode, "offset": offset, "line": line, "version": version,
+            "findings": json.loads(findings), "stats": json.loads(stats) if stats else None
+        }
+
+    def put(self, source: str, inode: int, offset: int, line: int, version: str,
+            findings: ScanResult, stats: LogStats):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO checkpoints (source, inode, offset, line, version, findings, stats, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (source, inode, offset, line, version, json.dumps(findings.to_dict()),
+                 json.dumps(stats.to_dict()), datetime.now().isoformat())
+            )
+            self._db.commit()
+
+    def clear(self, source: str = None):
+        with self._lock:
+            if source is None:
+                self._db.execute("DELETE FROM checkpoints")
+            else:
+                self._db.execute("DELETE FROM checkpoints WHERE source = ?", (source,))
+            self._db.commit()
+
+
+def scan_source(
+    source: LogSource,
+    engine: SignatureEngine,
+    store: CheckpointStore = None,
+    wrap=None,
+    stats: LogStats = None
+) -> ScanResult:
+    """
+    Findings for the whole source, scanning only what was appended since the
+    last checkpoint. `wrap` optionally wraps the line iterator (e.g. to
+    sample it); `result.new_lines` counts the lines actually scanned.
+    If given, `stats` is merged with the aggregates of the whole source; only
+    the appended lines are parsed into columns.
+    """
+    wrap = wrap or (lambda lines: lines)
+    if store is None or not source.seekable:
+        parsed = LogColumns()
+        result = engine.scan(wrap(parsed.observe(source.iter_lines(), source.name)), source.name)
+        if stats is not None:
+            stats.merge(parsed.stats())
+        return result
+
+    engine.maybe_reload()
+    key = os.path.abspath(source.path)
+    with _source_lock(key):
+        version = str(engine.version)
+        st = os.stat(source.path)
+        checkpoint = store.get(key)
+        index = TimeIndex.load(source.path)
+
+        if (checkpoint and checkpoint["inode"] == st.st_ino
+                and checkpoint["offset"] <= st.st_size and checkpoint["version"] == version
+                and index.inode == st.st_ino and index.offset == checkpoint["offset"]
+                and checkpoint["stats"] is not None):
+            result = ScanResult.from_dict(checkpoint["findings"])
+            totals = LogStats.from_dict(checkpoint["stats"])
+            start, first_line = checkpoint["offset"], checkpoint["line"]
+        else:
+            if checkpoint:
+                print(f"[Logs] {source.name}: rotated, truncated or new signatures - full rescan")
+            result, totals, start, first_line = ScanResult(), LogStats(), 0, 1
+            index.reset(st.st_ino)
+
+        parsed = LogColumns()  # appended lines only
+        lines = index.observe(source.iter_lines(start, first_line, complete_only=True))
+        engine.scan(wrap(parsed.observe(lines, source.name)), source.name, result)
+        if len(parsed):
+            totals.merge(parsed.stats())
+        index.offset, index.line = source.end_offset, source.next_line
+        index.save()
+        store.put(key, st.st_ino, source.end_offset, source.next_line, version, result, totals)
+        if stats is not None:
+            stats.merge(totals)
+        return result
+
+
+# Singleton
+_store = None
+_store_lock = threading.Lock()
+
+def get_checkpoint_store() -> CheckpointStore:
+    """Get the process-wide checkpoint store"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = CheckpointStore()
+    return _store
@@ -0,0 +1,216 @@
+"""
+Columnar Parsed Logs
+
+Log lines are parsed once into compact NumPy columns: int64 epoch
+timestamps, uint8 level codes, and interned component and message-template
+IDs (int32). Severity histograms, per-minute error rates and the top
+offending components are then plain vector operations (bincount/unique),
+so they stay fast over millions of lines.
+
+Checkpointed scans only parse the lines appended since the last check, so
+the columns of a run are reduced to a LogStats: level counts, per-minute
+line/error counts and error counts per component. Those aggregates are small,
+mergeable, and stored with the checkpoint instead of the raw columns.
+
+The component is the `name:` / `name[pid]:` prefix of the message when
+there is one (e.g. `sshd[812]:`, `ConnectionRefusedError:`), else the log
+source name. Message templates replace digits with `#`, so repeated events
+share one ID.
+"""
+
+import re
+from array import array
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+
+from tools.log_index import parse_timestamp
+from tools.log_sources import LogLine
+
+LEVELS = ["UNKNOWN", "DEBUG", "INFO", "WARN", "ERROR", "CRITICAL", "ALERT"]
+LEVEL_CODES = {
+    b"DEBUG": 1, b"TRACE": 1,
+    b"INFO": 2, b"NOTICE": 2,
+    b"WARN": 3, b"WARNING": 3,
+    b"ERROR": 4, b"ERR": 4,
+    b"CRITICAL": 5, b"CRIT": 5, b"FATAL": 5,
+    b"ALERT": 6, b"EMERG": 6,
+}
+WARN, ERROR, CRITICAL = 3, 4, 5
+
+_COMPONENT_RE = re.compile(rb"^([A-Za-z][\w.\-/]{1,63})(?:\[\d+\])?:\s")
+_DIGITS_RE = re.compile(rb"\d+")
+
+
+class _Interner:
+    """String <-> dense int ID"""
+
+    def __init__(self, values: Iterable[str] = ()):
+        self.values: List[str] = list(values)
+        self.ids: Dict[str, int] = {v: i for i, v in enumerate(self.values)}
+
+    def intern(self, value: str) -> int:
+        i = self.ids.get(value)
+        if i is None:
+            i = self.ids[value] = len(self.values)
+            self.values.append(value)
+        return i
+
+
+class LogColumns:
+    """
+    Append-only, in-memory columnar store of parsed log lines.
+    """
+
+    def __init__(self):
+        self.components = _Interner()
+        self.messages = _Interner()
+        self._base = {
+            "ts": np.empty(0, np.int64),
+            "level": np.empty(0, np.uint8),
+            "component": np.empty(0, np.int32),
+            "message": np.empty(0, np.int32),
+        }
+        self._tail = {"ts": array("q"), "level": array("B"), "component": array("i"), "message": array("i")}
+
+    def __len__(self) -> int:
+        return len(self._base["ts"]) + len(self._tail["ts"])
+
+    def append(self, line: LogLine, source: str):
+        ts = parse_timestamp(line.timestamp)
+        m = _COMPONENT_RE.match(line.message)
+        component = m.group(1).decode("utf-8", "replace") if m else source
+        template = _DIGITS_RE.sub(b"#", line.message[:200]).decode("utf-8", "replace")
+        self._tail["ts"].append(-1 if ts is None else ts)
+        self._tail["level"].append(LEVEL_CODES.get(line.level, 0))
+        self._tail["component"].append(self.components.intern(component))
+        self._tail["message"].append(self.messages.intern(template))
+
+    def observe(self, lines: Iterable[LogLine], source: str) -> Iterator[LogLine]:
+        """Pass lines through, appending each one to the columns"""
+        for line in lines:
+            self.append(line, source)
+            yield line
+
+    def column(self, name: str) -> np.ndarray:
+        """Full column as a NumPy array (pending rows are folded in on first access)"""
+        tail = self._tail[name]
+        if len(tail):
+            self._base[name] = np.concatenate([self._base[name], np.frombuffer(tail, dtype=self._base[name].dtype)])
+            self._tail[name] = array(tail.typecode)
+        return self._base[name]
+
+    # --- statistics ---
+
+    def severity_histogram(self) -> Dict[str, int]:
+        counts = np.bincount(self.column("level"), minlength=len(LEVELS))
+        return {LEVELS[i]: int(c) for i, c in enumerate(counts) if c}
+
+    def minute_counts(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(minute start epochs, lines per minute, ERROR-or-worse lines per minute) for timestamped lines"""
+        ts = self.column("ts")
+        valid = ts >= 0
+        if not valid.any():
+            empty = np.empty(0, np.int64)
+            return empty, empty, empty
+        minutes, inverse = np.unique(ts[valid] // 60, return_inverse=True)
+        totals = np.bincount(inverse)
+        errors = np.bincount(inverse, weights=self.column("level")[valid] >= ERROR).astype(np.int64)
+        return minutes * 60, totals, errors
+
+    def error_rate_per_minute(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(minute start epochs, lines per minute, error share per minute) for timestamped lines"""
+        minutes, totals, errors = self.minute_counts()
+        return minutes, totals, errors / np.maximum(totals, 1)
+
+    def top_components(self, n: int = 5, min_level: int = ERROR) -> List[Tuple[str, int]]:
+        """Components with the most entries at or above `min_level`"""
+        return self._top(self.column("component"), self.components, n, min_level)
+
+    def top_messages(self, n: int = 5, min_level: int = ERROR) -> List[Tuple[str, int]]:
+        """Most frequent message templates at or above `min_level`"""
+        return self._top(self.column("message"), self.messages, n, min_level)
+
+    def _top(self, ids: np.ndarray, interner: _Interner, n: int, min_level: int) -> List[Tuple[str, int]]:
+        selected = ids[self.column("level") >= min_level]
+        if not len(selected):
+            return []
+        counts = np.bincount(selected, minlength=len(interner.values))
+        order = np.argsort(-counts, kind="stable")[:n]
+        return [(interner.values[i], int(counts[i])) for i in order if counts[i]]
+
+    def stats(self) -> "LogStats":
+        """Aggregate the columns into a mergeable LogStats"""
+        stats = LogStats()
+        stats.levels = np.bincount(self.column("level"), minlength=len(LEVELS)).astype(np.int64)
+        stats.minutes, stats.minute_lines, stats.minute_errors = self.minute_counts()
+        stats.components = dict(self.top_components(n=len(self.components.values)))
+        return stats
+
+
+class LogStats:
+    """
+    Aggregates of parsed lines: level counts, per-minute line and error
+    counts (sorted by minute), and ERROR-or-worse counts per component.
+    """
+
+    def __init__(self):
+        self.levels = np.zeros(len(LEVELS), np.int64)
+        self.minutes = np.empty(0, np.int64)
+        self.minute_lines = np.empty(0, np.int64)
+        self.minute_errors = np.empty(0, np.int64)
+        self.components: Dict[str, int] = {}
+
+    @property
+    def lines(self) -> int:
+        return int(self.levels.sum())
+
+    def merge(self, other: "LogStats") -> "LogStats":
+        """Add another set of aggregates into this one"""
+        self.levels = self.levels + other.levels
+        minutes, inverse = np.unique(np.concatenate([self.minutes, other.minutes]), return_inverse=True)
+        for name in ("minute_lines", "minute_errors"):
+            weights = np.concatenate([getattr(self, name), getattr(other, name)])
+            setattr(self, name, np.bincount(inverse, weights=weights, minlength=len(minutes)).astype(np.int64))
+        self.minutes = minutes
+        for name, count in other.components.items():
+            self.components[name] = self.components.get(name, 0) + count
+        return self
+
+    def to_dict(self) -> dict:
+        return {
+            "levels": self.levels.tolist(),
+            "minutes": np.stack([self.minutes, self.minute_lines, self.minute_errors], axis=1).tolist(),
+            "components": self.components
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LogStats":
+        stats = cls()
+        stats.levels = np.array(data.get("levels") or stats.levels, dtype=np.int64)
+        minutes = np.array(data.get("minutes") or [], dtype=np.int64).reshape(-1, 3)
+        stats.minutes, stats.minute_lines, stats.minute_errors = minutes[:, 0], minutes[:, 1], minutes[:, 2]
+        stats.components = dict(data.get("components", {}))
+        return stats
+
+    def summary(self, top: int = 5, min_lines: int = 1) -> dict:
+        """
+        Headline numbers the LogAnalysisAgent bases its severity on. The peak
+        error rate only considers minutes with at least `min_lines` lines, so
+        a lone ERROR in a quiet minute does not read as a 100% spike.
+        """
+        total = self.lines
+        errors = int(self.levels[ERROR:].sum())
+        rates = np.where(self.minute_lines >= min_lines, self.minute_errors / np.maximum(self.minute_lines, 1), 0.0)
+        peak = int(np.argmax(rates)) if len(rates) and rates.max() > 0 else None
+        return {
+            "lines": total,
+            "warnings": int(self.levels[WARN]),
+            "errors": errors,
+            "critical": int(self.levels[CRITICAL:].sum()),
+            "error_share": errors / total if total else 0.0,
+            "peak_error_rate": float(rates[peak]) if peak is not None else 0.0,
+            "peak_minute": int(self.minutes[peak]) if peak is not None else None,
+            "severity": {LEVELS[i]: int(c) for i, c in enumerate(self.levels) if c},
+            "top_components": sorted(self.components.items(), key=lambda item: -item[1])[:top],
+        }
@@ -0,0 +1,166 @@
+"""
+Sparse Timestamp Index for Log Files
+
+For each log file a small sidecar (under LOG_INDEX_DIR) records the byte
+offset and line number of the first line of every time bucket
+(LOG_INDEX_BUCKET seconds). The index is extended while the checkpointed
+scan ingests new data, and time-window reads ("last 15 minutes") seek straight
+to the right offset instead of reading the file from the start.
+
+Windows are anchored to the latest log entry, not the wall clock, so old or
+replayed logs still answer "the last N minutes" of activity.
+"""
+
+import bisect
+import calendar
+import hashlib
+import json
+import os
+import re
+import tempfile
+from collections import deque
+from datetime import datetime
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from tools.log_sources import LogLine, LogSource
+
+LOG_INDEX_DIR = os.environ.get("LOG_INDEX_DIR", "./log_index")
+LOG_INDEX_BUCKET = int(os.environ.get("LOG_INDEX_BUCKET", 60))  # seconds
+
+_WINDOW_RE = re.compile(
+    r"\b(?:last|past|previous)\s+(?:(\d+)\s*)?(minutes?|mins?|m|hours?|hrs?|h|days?|d)\b",
+    re.IGNORECASE
+)
+_UNIT_SECONDS = {"m": 60, "h": 3600, "d": 86400}
+
+
+def sidecar_path(path: str, suffix: str, index_dir: str = LOG_INDEX_DIR) -> str:
+    """Where derived data for a log file lives: <index_dir>/<path hash>-<name><suffix>"""
+    path = os.path.abspath(path)
+    digest = hashlib.sha1(path.encode()).hexdigest()[:16]
+    return os.path.join(index_dir, f"{digest}-{os.path.basename(path)}{suffix}")
+
+
+def parse_timestamp(timestamp: Optional[str]) -> Optional[int]:
+    """Epoch seconds for "YYYY-MM-DD HH:MM[:SS]" (log times are taken as UTC)"""
+    if not timestamp:
+        return None
+    fmt = "%Y-%m-%d %H:%M:%S" if len(timestamp) > 16 else "%Y-%m-%d %H:%M"
+    try:
+        return calendar.timegm(datetime.strptime(timestamp, fmt).timetuple())
+    except ValueError:
+        return None
+
+
+def parse_time_window(message: str) -> Optional[int]:
+    """Seconds covered by phrases like "last 15 minutes" or "past hour", else None"""
+    m = _WINDOW_RE.search(message or "")
+    if not m:
+        return None
+    amount = int(m.group(1)) if m.group(1) else 1
+    unit = m.group(2).lower()[0]
+    return amount * _UNIT_SECONDS[unit] if amount > 0 else None
+
+
+class TimeIndex:
+    """
+    Bucket start -> (byte offset, line number) of the first line in that bucket.
+    `offset`/`line` mark how far the file has been indexed.
+    """
+
+    def __init__(self, path: str, bucket_seconds: int = LOG_INDEX_BUCKET, index_dir: str = LOG_INDEX_DIR):
+        self.path = os.path.abspath(path)
+        self.bucket_seconds = bucket_seconds
+        self.sidecar = sidecar_path(path, ".tsidx.json", index_dir)
+        self.reset(None)
+
+    def reset(self, inode: Optional[int]):
+        self.inode = inode
+        self.offset = 0
+        self.line = 1
+        self.buckets: List[int] = []
+        self.positions: List[Tuple[int, int]] = []
+        self.latest: Optional[int] = None
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "TimeIndex":
+        index = cls(path, **kwargs)
+        if os.path.exists(index.sidecar):
+            try:
+                with open(index.sidecar, encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("bucket_seconds") == index.bucket_seconds:
+                    index.inode = data["inode"]
+                    index.offset = data["offset"]
+                    index.line = data["line"]
+                    index.latest = data["latest"]
+                    index.buckets = [b for b, _, _ in data["entries"]]
+                    index.positions = [(o, n) for _, o, n in data["entries"]]
+            except (OSError, ValueError, KeyError):
+                index.reset(None)
+        return index
+
+    def save(self):
+        directory = os.path.dirname(self.sidecar) or "."
+        os.makedirs(directory, exist_ok=True)
+        # Unique temp name so concurrent writers never clobber each other's file
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({
+                "path": self.path,
+                "bucket_seconds": self.bucket_seconds,
+                "inode": self.inode,
+                "offset": self.offset,
+                "line": self.line,
+                "latest": self.latest,
+                "entries": [[b, o, n] for b, (o, n) in zip(self.buckets, self.positions)]
+            }, f)
+        os.replace(tmp, self.sidecar)
+
+    def observe(self, lines: Iterable[LogLine]) -> Iterator[LogLine]:
+        """Pass lines through, recording the first line of each new bucket"""
+        for line in lines:
+            ts = parse_timestamp(line.timestamp)
+            if ts is not None:
+                bucket = ts - ts % self.bucket_seconds
+                if not self.buckets or bucket > self.buckets[-1]:
+                    self.buckets.append(bucket)
+                    self.positions.append((line.offset, line.number))
+                if self.latest is None or ts > self.latest:
+                    self.latest = ts
+            yield line
+
+    def seek(self, since: int) -> Tuple[int, int]:
+        """(offset, line number) to start reading from to see every entry at or after `since`"""
+        i = bisect.bisect_right(self.buckets, since - since % self.bucket_seconds) - 1
+        return self.positions[i] if i >= 0 else (0, 1)
+
+
+def window_lines(source: LogSource, seconds: int) -> Tuple[List[LogLine], Optional[int]]:
+    """
+    Lines within `seconds` of the source's latest entry, and that anchor time.
+    Indexed files seek directly to the window; other sources are streamed
+    once through a sliding window.
+    """
+    if source.seekable:
+        index = TimeIndex.load(source.path)
+        if index.latest is not None and index.inode == os.stat(source.path).st_ino:
+            since = index.latest - seconds
+            offset, number = index.seek(since)
+            lines = [
+                line for line in source.iter_lines(offset, number, complete_only=True)
+                if (parse_timestamp(line.timestamp) or since) >= since
+            ]
+            return lines, index.latest
+
+    window: deque = deque()
+    latest = None
+    for line in source.iter_lines():
+        ts = parse_timestamp(line.timestamp)
+        if ts is not None and (latest is None or ts > latest):
+            latest = ts
+            # Untimestamped lines at the front belong to an entry that already left the window
+            while window and (window[0][0] is None or window[0][0] < latest - seconds):
+                window.popleft()
+        window.append((ts, line))
+    return [line for _, line in window], latest
@@ -0,0 +1,172 @@
+"""
+Pluggable Log Sources
+
+Streams log lines to the LogAnalysisAgent without loading whole files:
+plain files are memory-mapped, gzip files are decompressed in fixed-size
+chunks, and demo users fall back to the inline strings from
+`fetch_recent_logs`. Lines are yielded as raw bytes plus the parsed
+timestamp and level, so callers can match on the bytes directly.
+
+Files are looked up under LOG_DIR as `<user_id>.log[.gz]`, rotated
+`<user_id>.log.<n>[.gz]`, or `<user_id>/*.log[.gz]`. Names must match the user
+id exactly, so `user_dev` never picks up `user_dev2.log`.
+"""
+
+import glob
+import gzip
+import mmap
+import os
+import re
+from typing import Iterator, List, NamedTuple, Optional
+
+from tools.mcp_tools import fetch_recent_logs
+
+LOG_DIR = os.environ.get("LOG_DIR", "")
+LOG_CHUNK_SIZE = int(os.environ.get("LOG_CHUNK_SIZE", 1 << 20))  # bytes per gzip read
+
+# "[2025-12-02 14:00:01] WARN: message" (seconds optional)
+_LINE_RE = re.compile(rb"^\[(\d{4}-\d{2}-\d{2} \d{2}:\d{2}(?::\d{2})?)\]\s*([A-Za-z]+):?\s*(.*)$", re.DOTALL)
+
+
+class LogLine(NamedTuple):
+    number: int                # 1-based line number within the source
+    offset: int                # byte offset of the line start
+    raw: bytes                 # line without the trailing newline or indentation
+    timestamp: Optional[str]   # "YYYY-MM-DD HH:MM[:SS]" or None
+    level: Optional[bytes]     # b"ERROR", b"WARN", ... or None
+    message: bytes             # text after the level (the whole line if unparsed)
+
+
+def parse_line(number: int, offset: int, raw: bytes) -> LogLine:
+    raw = raw.strip()
+    m = _LINE_RE.match(raw)
+    if m:
+        return LogLine(number, offset, raw, m.group(1).decode("ascii"), m.group(2).upper(), m.group(3))
+    return LogLine(number, offset, raw, None, None, raw)
+
+
+def _split_lines(buffer, start: int, end: int, first_line: int) -> Iterator[LogLine]:
+    """
+    Yield the non-blank lines of buffer[start:end]; works on bytes and mmaps
+    alike. Returns the number the next line would get.
+    """
+    number = first_line
+    pos = start
+    while pos < end:
+        nl = buffer.find(b"\n", pos, end)
+        stop = end if nl == -1 else nl
+        raw = buffer[pos:stop]
+        if raw.strip():
+            yield parse_line(number, pos, raw)
+        number += 1
+        pos = stop + 1
+    return number
+
+
+class LogSource:
+    """A named stream of log lines"""
+
+    name: str = ""
+    seekable = False  # True if iter_lines can resume from a byte offset
+
+    def iter_lines(self) -> Iterator[LogLine]:
+        raise NotImplementedError
+
+
+class InlineLogSource(LogSource):
+    """In-memory text, used for the demo users"""
+
+    def __init__(self, name: str, text: str):
+        self.name = name
+        self.data = text.encode("utf-8")
+
+    def iter_lines(self) -> Iterator[LogLine]:
+        return _split_lines(self.data, 0, len(self.data), 1)
+
+
+class FileLogSource(LogSource):
+    """
+    Plain log file, memory-mapped so the OS pages it in on demand.
+    After iteration, `end_offset` and `next_line` tell where to resume.
+    """
+
+    seekable = True
+
+    def __init__(self, path: str):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.end_offset = 0
+        self.next_line = 1
+
+    def iter_lines(self, start: int = 0, first_line: int = 1, complete_only: bool = False) -> Iterator[LogLine]:
+        """
+        Lines from byte offset `start`. With `complete_only`, a trailing line
+        that is still being written (no newline yet) is left for the next read.
+        """
+        self.end_offset, self.next_line = start, first_line
+        with open(self.path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size <= start:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                end = mm.rfind(b"\n", start, size) + 1 if complete_only else size
+                if end <= start:
+                    return
+                self.next_line = yield from _split_lines(mm, start, end, first_line)
+                self.end_offset = end
+
+
+class GzipLogSource(LogSource):
+    """Gzip-compressed log file, decompressed in LOG_CHUNK_SIZE chunks"""
+
+    def __init__(self, path: str, chunk_size: int = LOG_CHUNK_SIZE):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.chunk_size = chunk_size
+
+    def iter_lines(self) -> Iterator[LogLine]:
+        number, offset, pending = 1, 0, b""
+        with gzip.open(self.path, "rb") as f:
+            while True:
+                chunk = f.read(self.chunk_size)
+                if not chunk:
+                    break
+                data = pending + chunk
+                cut = data.rfind(b"\n") + 1  # only complete lines
+                for line in _split_lines(data, 0, cut, number):
+                    yield line._replace(offset=offset + line.offset)
+                number += data.count(b"\n", 0, cut)
+                offset += cut
+                pending = data[cut:]
+        if pending.strip():
+            yield parse_line(number, offset, pending)
+
+
+def open_log_source(path: str) -> LogSource:
+    return GzipLogSource(path) if path.endswith(".gz") else FileLogSource(path)
+
+
+def find_log_files(user_id: str, log_dir: str = None) -> List[str]:
+    """Log files for a user under `log_dir`, sorted by name"""
+    log_dir = LOG_DIR if log_dir is None else log_dir
+    if not log_dir or not os.path.isdir(log_dir):
+        return []
+    if not user_id or os.sep in user_id or user_id.startswith("."):
+        return []
+    uid = glob.escape(user_id)
+    paths = set()
+    for pattern in (
+        f"{uid}.log", f"{uid}.log.gz", f"{uid}.log.[0-9]*",
+        os.path.join(uid, "*.log"), os.path.join(uid, "*.log.gz")
+    ):
+        paths.update(glob.glob(os.path.join(log_dir, pattern)))
+    return sorted(p for p in paths if os.path.isfile(p))
+
+
+def get_log_sources(user_id: str) -> List[LogSource]:
+    """Real log files for the user when LOG_DIR has any, else the inline demo logs"""
+    paths = find_log_files(user_id)
+    if paths:
+        print(f"[Logs] {len(paths)} file(s) for {user_id} under {LOG_DIR}")
+        return [open_log_source(p) for p in paths]
+    return [InlineLogSource(f"{user_id} (demo)", fetch_recent_logs(user_id))]
@@ -0,0 +1,249 @@
+"""
+Threat Signature Engine
+
+Compiles every literal threat, error and warning indicator into one
+case-insensitive bytes regex and classifies each log line in a single pass.
+Literal indicators are folded into a prefix trie inside a lookahead, so the
+per-position cost grows with indicator length rather than with the number
+of indicators and overlapping indicators are all reported. An indicator may
+belong to several signatures. Signatures with `"regex": true` are checked as
+their own patterns after the literal pass.
+
+Signatures come from built-in defaults plus an optional JSON file
+(LOG_SIGNATURES_PATH). The file is reloaded automatically when its mtime
+changes:
+
+    [{"name": "cobalt_strike", "category": "threat",
+      "patterns": ["beacon.dll", "cobaltstrike"]},
+     {"name": "c2_ip", "category": "threat", "regex": true,
+      "patterns": ["10\\.66\\.\\d+\\.\\d+"]}]
+
+Entries override defaults with the same name. Categories are "threat",
+"error" or "warning".
+"""
+
+import json
+import os
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+LOG_SIGNATURES_PATH = os.environ.get("LOG_SIGNATURES_PATH", "./signatures.json")
+MAX_LINE_REFS = 20  # line numbers kept per signature
+
+DEFAULT_SIGNATURES = [
+    {"name": "ransomware", "category": "threat", "patterns": ["encrypt", ".crypt", "ransom", "bitcoin", "wannacry"]},
+    {"name": "phishing", "category": "threat", "patterns": ["phishing", "credential", "harvest", "suspicious link"]},
+    {"name": "exfiltration", "category": "threat", "patterns": ["exfil", "large upload", "dropbox", "sensitive data"]},
+    {"name": "intrusion", "category": "threat", "patterns": ["unauthorized", "port scan", "brute force", "failed login"]},
+    {"name": "error", "category": "error", "patterns": ["error"]},
+    {"name": "warning", "category": "warning", "patterns": ["warning"]},
+]
+
+
+def _trie_regex(words: Iterable[bytes]) -> bytes:
+    """Regex source matching any of `words`, with shared prefixes factored out"""
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for byte in word:
+            node = node.setdefault(byte, {})
+        node[None] = {}
+
+    def build(node: dict) -> bytes:
+        branches = [re.escape(bytes([k])) + build(node[k]) for k in sorted(k for k in node if k is not None)]
+        if not branches:
+            return b""
+        body = branches[0] if len(branches) == 1 else b"(?:" + b"|".join(branches) + b")"
+        if None in node:
+            body = b"(?:" + body + b")?"
+        return body
+
+    return build(trie)
+
+
+class ScanResult:
+    """Per-signature hit counts and (source, line number) references"""
+
+    def __init__(self):
+        self.hits: Dict[str, int] = {}
+        self.lines: Dict[str, List[Tuple[str, int]]] = {}
+        self.categories: Dict[str, str] = {}
+        self.lines_scanned = 0
+        self.new_lines = 0  # lines scanned in this run (less than lines_scanned when resumed from a checkpoint)
+        self.new_hits: Dict[str, int] = {}  # hits among those new lines (not persisted)
+
+    def add(self, signature: str, category: str, source: str, number: int):
+        self.hits[signature] = self.hits.get(signature, 0) + 1
+        self.new_hits[signature] = self.new_hits.get(signature, 0) + 1
+        self.categories[signature] = category
+        refs = self.lines.setdefault(signature, [])
+        if len(refs) < MAX_LINE_REFS:
+            refs.append((source, number))
+
+    def in_category(self, category: str) -> List[str]:
+        """Signatures of `category` that matched, most hits first"""
+        names = [name for name, cat in self.categories.items() if cat == category]
+        return sorted(names, key=lambda name: -self.hits[name])
+
+    @property
+    def threats(self) -> List[str]:
+        return self.in_category("threat")
+
+    @property
+    def new_threats(self) -> List[str]:
+        """Threat signatures hit by lines scanned in this run"""
+        return [name for name in self.threats if self.new_hits.get(name)]
+
+    def has(self, category: str) -> bool:
+        return any(cat == category for cat in self.categories.values())
+
+    def merge(self, other: "ScanResult") -> "ScanResult":
+        """Add another result's findings into this one"""
+        for name, count in other.hits.items():
+            self.hits[name] = self.hits.get(name, 0) + count
+            self.categories[name] = other.categories[name]
+            if other.new_hits.get(name):
+                self.new_hits[name] = self.new_hits.get(name, 0) + other.new_hits[name]
+            refs = self.lines.setdefault(name, [])
+            refs.extend(other.lines.get(name, [])[:MAX_LINE_REFS - len(refs)])
+        self.lines_scanned += other.lines_scanned
+        self.new_lines += other.new_lines
+        return self
+
+    def to_dict(self) -> dict:
+        return {
+            "hits": self.hits,
+            "lines": {name: [list(ref) for ref in refs] for name, refs in self.lines.items()},
+            "categories": self.categories,
+            "lines_scanned": self.lines_scanned
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ScanResult":
+        result = cls()
+        result.hits = dict(data.get("hits", {}))
+        result.lines = {name: [tuple(ref) for ref in refs] for name, refs in data.get("lines", {}).items()}
+        result.categories = dict(data.get("categories", {}))
+        result.lines_scanned = data.get("lines_scanned", 0)
+        return result
+
+
+class SignatureEngine:
+    """
+    Single-pass classifier over log lines, rebuilt when the signature file changes.
+    """
+
+    def __init__(self, path: str = LOG_SIGNATURES_PATH):
+        self.path = path
+        self.signatures: List[dict] = []
+        self._mtime: Optional[float] = None
+        self._lock = threading.Lock()
+        self._compile(list(DEFAULT_SIGNATURES))
+        self.maybe_reload()
+
+    def _load(self) -> List[dict]:
+        signatures = {s["name"]: s for s in DEFAULT_SIGNATURES}
+        if self.path and os.path.exists(self.path):
+            self._mtime = os.path.getmtime(self.path)
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            for entry in data.get("signatures", []) if isinstance(data, dict) else data:
+                signatures[entry["name"]] = {
+                    "name": entry["name"],
+                    "category": entry.get("category", "threat"),
+                    "patterns": list(entry["patterns"]),
+                    "regex": bool(entry.get("regex", False))
+                }
+        else:
+            self._mtime = None
+        return list(signatures.values())
+
+    def _compile(self, signatures: List[dict]):
+        literals: Dict[bytes, Set[str]] = {}
+        patterns: List[Tuple[str, "re.Pattern"]] = []
+        for sig in signatures:
+            if sig.get("regex"):
+                patterns.append((sig["name"], re.compile(b"|".join(p.encode() for p in sig["patterns"]), re.IGNORECASE)))
+            else:
+                for pattern in sig["patterns"]:
+                    literals.setdefault(pattern.lower().encode(), set()).add(sig["name"])
+
+        # The lookahead reports the longest indicator starting at each position;
+        # every indicator that is a prefix of it matched there as well
+        names = {
+            literal: frozenset().union(*(owners for other, owners in literals.items() if literal.startswith(other)))
+            for literal in literals
+        }
+        regex = re.compile(b"(?=(" + _trie_regex(literals) + b"))", re.IGNORECASE) if literals else None
+        categories = {sig["name"]: sig.get("category", "threat") for sig in signatures}
+        with self._lock:
+            self.signatures = signatures
+            # Swapped as one tuple so a concurrent scan never mixes old and new tables
+            self._compiled = (regex, names, patterns, categories)
+
+    def maybe_reload(self) -> bool:
+        """Recompile if the signature file was added, changed or removed"""
+        mtime = os.path.getmtime(self.path) if self.path and os.path.exists(self.path) else None
+        if mtime == self._mtime:
+            return False
+        try:
+            self._compile(self._load())
+        except (OSError, ValueError, KeyError, re.error) as e:
+            print(f"[Signatures] Reload of {self.path} failed, keeping previous set: {e}")
+            self._mtime = mtime
+            return False
+        print(f"[Signatures] Loaded {len(self.signatures)} signatures from {self.path}")
+        return True
+
+    @property
+    def version(self) -> Optional[float]:
+        """Changes whenever the active signature set does"""
+        return self._mtime
+
+    @property
+    def categories(self) -> Dict[str, str]:
+        return self._compiled[3]
+
+    @staticmethod
+    def _match(compiled: tuple, raw: bytes) -> Set[str]:
+        regex, names, patterns, _ = compiled
+        found = set()
+        if regex is not None:
+            for m in regex.finditer(raw):
+                found.update(names[m.group(1).lower()])
+        for name, pattern in patterns:
+            if name not in found and pattern.search(raw):
+                found.add(name)
+        return found
+
+    def match_line(self, raw: bytes) -> Set[str]:
+        """Names of every signature found in one line"""
+        return self._match(self._compiled, raw)
+
+    def scan(self, lines: Iterable, source: str = "", result: ScanResult = None) -> ScanResult:
+        """Classify every line (objects with `.raw` and `.number`) in a single pass"""
+        self.maybe_reload()
+        compiled = self._compiled
+        categories = compiled[3]
+        result = result or ScanResult()
+        for line in lines:
+            result.lines_scanned += 1
+            result.new_lines += 1
+            for name in self._match(compiled, line.raw):
+                result.add(name, categories[name], source, line.number)
+        return result
+
+
+# Singleton
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_signature_engine() -> SignatureEngine:
+    """Get the process-wide signature engine"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = SignatureEngine()
+    return _engine
@@ -0,0 +1,224 @@
+"""
+Persistent Audit Sink
+
+Append-only audit trail backed by SQLite. Agents hand entries to an
+in-memory queue and return immediately; a background writer flushes them in
+batches (on size or time). Only a bounded tail of recent entries is kept in
+memory, and the Audit Log tab reads from the indexed table, filtered to its
+own session. If the database cannot be opened the sink runs memory-only:
+entries are kept in (and queried from) the tail.
+"""
+
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import List, Optional
+
+AUDIT_DB_PATH = os.environ.get("AUDIT_DB_PATH", "./audit_log.db")
+AUDIT_BATCH_SIZE = int(os.environ.get("AUDIT_BATCH_SIZE", 100))
+AUDIT_FLUSH_INTERVAL = float(os.environ.get("AUDIT_FLUSH_INTERVAL", 1.0))  # seconds
+AUDIT_TAIL_SIZE = int(os.environ.get("AUDIT_TAIL_SIZE", 500))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS audit (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    agent TEXT NOT NULL,
+    action TEXT NOT NULL,
+    user_id TEXT,
+    details TEXT,
+    session_id TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_audit_timestamp ON audit (timestamp);
+CREATE INDEX IF NOT EXISTS idx_audit_user ON audit (user_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_audit_agent ON audit (agent, timestamp);
+"""
+
+
+class AuditSink:
+    """
+    Write-behind audit log: non-blocking `write`, batched SQLite flushes, bounded tail.
+    """
+
+    def __init__(
+        self,
+        path: str = AUDIT_DB_PATH,
+        batch_size: int = AUDIT_BATCH_SIZE,
+        flush_interval: float = AUDIT_FLUSH_INTERVAL,
+        tail_size: int = AUDIT_TAIL_SIZE
+    ):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[Optional[dict]]" = queue.Queue()
+        self._tail = deque(maxlen=tail_size)
+        self._stats = {"written": 0, "flushes": 0, "errors": 0}
+
+        self.persistent = self._open_db(path)
+
+        self._writer = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        if self.persistent:
+            self._writer.start()
+
+    def _open_db(self, path: str) -> bool:
+        """Create or migrate the audit table; False (memory-only) if the database is unavailable"""
+        try:
+            db = sqlite3.connect(path)
+            try:
+                db.execute("PRAGMA journal_mode=WAL")
+                db.executescript(_SCHEMA)
+                if "session_id" not in {row[1] for row in db.execute("PRAGMA table_info(audit)")}:
+                    db.execute("ALTER TABLE audit ADD COLUMN session_id TEXT")
+                db.execute("CREATE INDEX IF NOT EXISTS idx_audit_session ON audit (session_id, timestamp)")
+                db.commit()
+            finally:
+                db.close()
+            return True
+        except sqlite3.Error as e:
+            print(f"[Audit] Database unavailable - keeping the tail in memory only: {e}")
+            return False
+
+    def write(self, entry: dict):
+        """Queue an entry for persistence; never blocks on I/O"""
+        self._tail.append(entry)
+        if self.persistent:
+            self._queue.put(entry)
+
+    def _run(self):
+        db = sqlite3.connect(self.path)
+        batch: List[dict] = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                entry = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                entry = ...
+            if entry is None:  # close()
+                self._flush(db, batch)
+                self._queue.task_done()
+                break
+            if isinstance(entry, threading.Event):  # flush() - write now, don't wait for the deadline
+                self._flush(db, batch)
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+                entry.set()
+                self._queue.task_done()
+                continue
+            if entry is not ...:
+                batch.append(entry)
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                self._flush(db, batch)
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+        db.close()
+
+    def _flush(self, db: sqlite3.Connection, batch: List[dict]):
+        if not batch:
+            return
+        try:
+            db.executemany(
+                "INSERT INTO audit (timestamp, agent, action, user_id, session_id, details) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (e["timestamp"], e["agent"], e["action"], e.get("user_id"), e.get("session_id"),
+                     json.dumps(e.get("details") or {}, default=str))
+                    for e in batch
+                ]
+            )
+            db.commit()
+            self._stats["written"] += len(batch)
+            self._stats["flushes"] += 1
+        except sqlite3.Error as e:
+            self._stats["errors"] += 1
+            print(f"[Audit] Flush failed ({len(batch)} entries): {e}")
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+    def flush(self, timeout: float = None) -> bool:
+        """Have the writer persist everything queued so far; False if it did not finish within `timeout`"""
+        if not self._writer.is_alive():
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self):
+        """Flush pending entries and stop the writer"""
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+
+    def tail(self, limit: int = 20) -> List[dict]:
+        """Most recent entries from memory, newest first"""
+        return list(self._tail)[-limit:][::-1]
+
+    def query(
+        self,
+        agent: str = None,
+        action: str = None,
+        user_id: str = None,
+        session_id: str = None,
+        since: str = None,
+        limit: int = 50
+    ) -> List[dict]:
+        """Persisted entries matching the filters, newest first (tail entries when memory-only)"""
+        if not self.persistent:
+            filters = {"agent": agent, "action": action, "user_id": user_id, "session_id": session_id}
+            return [
+                e for e in reversed(self._tail)
+                if all(not value or e.get(key) == value for key, value in filters.items())
+                and (not since or e["timestamp"] >= since)
+            ][:limit]
+        self.flush(timeout=self.flush_interval)  # pending entries are written immediately, not at the next interval
+        clauses, params = [], []
+        for column, value in (("agent", agent), ("action", action), ("user_id", user_id), ("session_id", session_id)):
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        params.append(limit)
+
+        db = sqlite3.connect(self.path)
+        try:
+            rows = db.execute(
+                f"SELECT timestamp, agent, action, user_id, session_id, details FROM audit {where} "
+                "ORDER BY timestamp DESC, id DESC LIMIT ?",
+                params
+            ).fetchall()
+        finally:
+            db.close()
+        return [
+            {"timestamp": ts, "agent": agent, "action": action, "user_id": uid, "session_id": sid,
+             "details": json.loads(details or "{}")}
+            for ts, agent, action, uid, sid, details in rows
+        ]
+
+    def stats(self) -> dict:
+        stats = dict(self._stats)
+        stats["persistent"] = self.persistent
+        stats["queued"] = self._queue.qsize()
+        stats["tail"] = len(self._tail)
+        return stats
+
+
+# Singleton
+_audit_sink = None
+_audit_sink_lock = threading.Lock()
+
+def get_audit_sink() -> AuditSink:
+    """Get the process-wide audit sink"""
+    global _audit_sink
+    if _audit_sink is None:
+        with _audit_sink_lock:
+            if _audit_sink is None:
+                _audit_sink = AuditSink()
+                atexit.register(_audit_sink.close)
+    return _audit_sink
@@ -0,0 +1,173 @@
+"""
+Result Cache for LLM Calls
+
+Near-identical tickets ("reset my MFA", "VPN won't connect") should not each
+pay for a fresh Gemini call. Results are kept in two tiers:
+a bounded in-memory LRU in front of a SQLite table that survives restarts.
+Entries expire after a TTL in both tiers.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+# Configuration - override via environment
+CACHE_PATH = os.environ.get("LLM_CACHE_PATH", "./llm_cache.db")
+CACHE_TTL_SECONDS = int(os.environ.get("LLM_CACHE_TTL", 24 * 60 * 60))
+CACHE_MAX_ENTRIES = int(os.environ.get("LLM_CACHE_SIZE", 1024))
+
+# Run a full expiry sweep of the disk tier every N writes
+_SWEEP_EVERY = 256
+
+
+def normalize_message(message: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation"""
+    text = re.sub(r"\s+", " ", message.lower()).strip()
+    return text.rstrip(" .!?")
+
+
+def make_key(namespace: str, message: str, catalog: str = "") -> str:
+    """Cache key from the normalized message and a hash of the tool catalog"""
+    catalog_hash = hashlib.sha256(catalog.encode("utf-8")).hexdigest()[:16] if catalog else ""
+    raw = f"{namespace}|{normalize_message(message)}|{catalog_hash}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    Two-tier (memory LRU + SQLite) cache of JSON-serializable results with TTL eviction.
+    """
+
+    def __init__(self, path: str = CACHE_PATH, ttl: int = CACHE_TTL_SECONDS, max_entries: int = CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._memory = OrderedDict()  # key -> (created, json)
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "expired": 0, "evicted": 0}
+        self._db = self._open_db(path)
+
+    def _open_db(self, path: str) -> Optional[sqlite3.Connection]:
+        """Open the disk tier; fall back to memory-only if it is unavailable"""
+        if not path:
+            return None
+        try:
+            db = sqlite3.connect(path, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            db.commit()
+            return db
+        except sqlite3.Error as e:
+            print(f"[Cache] Disk tier unavailable - memory only: {e}")
+            return None
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return a fresh copy of the cached value, or None on miss/expiry"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created, value = entry
+                if now - created <= self.ttl:
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return json.loads(value)
+                del self._memory[key]
+                self._stats["expired"] += 1
+
+            if self._db is not None:
+                row = self._db.execute("SELECT value, created FROM results WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    value, created = row
+                    if now - created <= self.ttl:
+                        self._remember(key, created, value)
+                        self._stats["disk_hits"] += 1
+                        return json.loads(value)
+                    self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+                    self._db.commit()
+                    self._stats["expired"] += 1
+
+            self._stats["misses"] += 1
+            return None
+
+    def set(self, key: str, value: dict):
+        """Store a result in both tiers"""
+        created = time.time()
+        encoded = json.dumps(value)
+        with self._lock:
+            self._remember(key, created, encoded)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO results (key, value, created) VALUES (?, ?, ?)",
+                    (key, encoded, created)
+                )
+                self._db.commit()
+                self._writes += 1
+                if self._writes % _SWEEP_EVERY == 0:
+                    self._sweep(created)
+
+    def _remember(self, key: str, created: float, encoded: str):
+        self._memory[key] = (created, encoded)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._stats["evicted"] += 1
+
+    def _sweep(self, now: float) -> int:
+        cursor = self._db.execute("DELETE FROM results WHERE created < ?", (now - self.ttl,))
+        self._db.commit()
+        self._stats["expired"] += cursor.rowcount
+        return cursor.rowcount
+
+    def evict_expired(self) -> int:
+        """Drop expired entries from both tiers; returns the number removed"""
+        now = time.time()
+        with self._lock:
+            stale = [k for k, (created, _) in self._memory.items() if now - created > self.ttl]
+            for k in stale:
+                del self._memory[k]
+            self._stats["expired"] += len(stale)
+            removed = self._sweep(now) if self._db is not None else 0
+        return len(stale) + removed
+
+    def clear(self):
+        """Remove everything from both tiers"""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM results")
+                self._db.commit()
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current sizes"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_size"] = len(self._memory)
+            if self._db is not None:
+                stats["disk_size"] = self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+
+
+# Singleton
+_result_cache = None
+_result_cache_lock = threading.Lock()
+
+def get_result_cache() -> ResultCache:
+    """Get the process-wide result cache"""
+    global _result_cache
+    if _result_cache is None:
+        with _result_cache_lock:
+            if _result_cache is None:
+                _result_cache = ResultCache()
+    return _result_cache
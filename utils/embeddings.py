@@ -0,0 +1,137 @@
+"""
+Offline Hashing-Vectorizer Embeddings
+
+Deterministic local embeddings for when Gemini embeddings are unavailable
+(no API key, 429 quota errors). Word and character n-grams are hashed into a
+fixed number of features, weighted with sublinear TF-IDF and L2-normalized.
+A whole batch is embedded as one NumPy matrix.
+
+IDF weights are fitted once on the corpus (see `fit`) and saved next to the
+vector store, so queries and documents are always weighted the same way. The
+file is re-read when its mtime changes, so long-running processes pick up an
+IDF fitted later by setup_rag.py. `fingerprint` identifies the resulting
+vector space (features, n-grams, IDF).
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+import zlib
+from typing import List, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# Unset: utils.rag keeps the IDF in the active vector store's directory
+EMBEDDING_IDF_PATH = os.environ.get("EMBEDDING_IDF_PATH", "")
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    Feature-hashing embeddings with word and char n-grams and TF-IDF weighting.
+    """
+
+    def __init__(
+        self,
+        n_features: int = 768,
+        word_ngrams: Tuple[int, int] = (1, 2),
+        char_ngrams: Tuple[int, int] = (3, 5),
+        idf_path: str = EMBEDDING_IDF_PATH
+    ):
+        self.n_features = n_features
+        self.word_ngrams = word_ngrams
+        self.char_ngrams = char_ngrams
+        self.idf_path = idf_path
+        self._idf_mtime = None
+        self.idf = self._load_idf()
+
+    @property
+    def is_fitted(self) -> bool:
+        self._refresh_idf()
+        return self.idf is not None
+
+    @property
+    def fingerprint(self) -> str:
+        """Changes whenever documents embedded before would land in a different vector space"""
+        self._refresh_idf()
+        idf = hashlib.sha1(self.idf.tobytes()).hexdigest()[:12] if self.idf is not None else "none"
+        return f"hashing:{self.n_features}:w{self.word_ngrams}:c{self.char_ngrams}:idf={idf}"
+
+    def _idf_file_mtime(self):
+        return os.path.getmtime(self.idf_path) if self.idf_path and os.path.exists(self.idf_path) else None
+
+    def _load_idf(self):
+        self._idf_mtime = self._idf_file_mtime()
+        if self._idf_mtime is not None:
+            idf = np.load(self.idf_path)
+            if idf.shape == (self.n_features,):
+                return idf.astype(np.float32)
+            print(f"[Embeddings] Ignoring IDF file with wrong shape: {self.idf_path}")
+        return None
+
+    def _refresh_idf(self):
+        """Reload the IDF weights if the file was written (or removed) since they were loaded"""
+        if self._idf_file_mtime() != self._idf_mtime:
+            self.idf = self._load_idf()
+
+    def _features(self, text: str) -> List[int]:
+        """Hashed feature indices (with repeats) for the text's n-grams"""
+        words = _WORD_RE.findall(text.lower())
+        grams = []
+        lo, hi = self.word_ngrams
+        for n in range(lo, hi + 1):
+            grams.extend("w:" + " ".join(words[i:i + n]) for i in range(len(words) - n + 1))
+        lo, hi = self.char_ngrams
+        for word in words:
+            padded = f" {word} "
+            for n in range(lo, hi + 1):
+                grams.extend("c:" + padded[i:i + n] for i in range(len(padded) - n + 1))
+        return [zlib.crc32(g.encode("utf-8")) % self.n_features for g in grams]
+
+    def _counts(self, texts: List[str]) -> np.ndarray:
+        """Raw n-gram count matrix (n_texts x n_features) built in one scatter-add"""
+        rows, cols = [], []
+        for row, text in enumerate(texts):
+            features = self._features(text)
+            rows.extend([row] * len(features))
+            cols.extend(features)
+        counts = np.zeros((len(texts), self.n_features), dtype=np.float32)
+        if cols:
+            np.add.at(counts, (np.asarray(rows, dtype=np.intp), np.asarray(cols, dtype=np.intp)), 1.0)
+        return counts
+
+    def fit(self, texts: List[str]) -> "HashingEmbeddings":
+        """Fit IDF weights on a corpus and persist them"""
+        counts = self._counts(texts)
+        doc_freq = np.count_nonzero(counts, axis=0)
+        n_docs = len(texts)
+        self.idf = (np.log((1.0 + n_docs) / (1.0 + doc_freq)) + 1.0).astype(np.float32)
+        if self.idf_path:
+            directory = os.path.dirname(self.idf_path) or "."
+            os.makedirs(directory, exist_ok=True)
+            # Written aside and renamed, so a concurrent reload never sees a partial file
+            fd, tmp = tempfile.mkstemp(dir=directory, suffix=".npy")
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, self.idf)
+            os.replace(tmp, self.idf_path)
+            self._idf_mtime = self._idf_file_mtime()
+        return self
+
+    def embed_array(self, texts: List[str]) -> np.ndarray:
+        """Embed a batch of texts into a normalized float32 matrix"""
+        self._refresh_idf()
+        matrix = np.log1p(self._counts(texts))
+        if self.idf is not None:
+            matrix *= self.idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_array(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_array([text])[0].tolist()
@@ -0,0 +1,103 @@
+"""
+Keyword Router for the Offline Fallback
+
+Compiles keyword rules (label -> keywords) into a single Aho-Corasick
+automaton, so one pass over the message scores every label at once no matter
+how many keywords the tables hold. Matching keeps the substring semantics of
+the old `word in message_lower` checks.
+"""
+
+from collections import deque
+from typing import Dict, Iterable, List, Tuple
+
+
+class KeywordRouter:
+    """
+    Multi-pattern matcher that scores labels by the number of distinct keywords hit.
+    Ties are broken by the order in which labels were declared.
+    """
+
+    def __init__(self, rules: Dict[str, Iterable[str]]):
+        self.labels: List[str] = list(rules)
+        self._label_order = {label: i for i, label in enumerate(self.labels)}
+        self._keywords: List[str] = []
+        self._keyword_labels: List[List[str]] = []
+
+        index = {}
+        for label, keywords in rules.items():
+            for keyword in keywords:
+                keyword = keyword.lower()
+                if keyword not in index:
+                    index[keyword] = len(self._keywords)
+                    self._keywords.append(keyword)
+                    self._keyword_labels.append([])
+                self._keyword_labels[index[keyword]].append(label)
+
+        self._build()
+
+    def _build(self):
+        """Build the trie, failure links and merged outputs"""
+        goto = [{}]
+        out = [[]]
+        for kw_id, keyword in enumerate(self._keywords):
+            state = 0
+            for ch in keyword:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    out.append([])
+                state = nxt
+            out[state].append(kw_id)
+
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0) if goto[f].get(ch, 0) != nxt else 0
+                out[nxt] = out[nxt] + out[fail[nxt]]
+
+        self._goto = goto
+        self._fail = fail
+        self._out = out
+
+    def matches(self, text: str) -> Dict[str, List[str]]:
+        """Distinct keywords found in `text`, grouped by label"""
+        goto, fail, out = self._goto, self._fail, self._out
+        seen = set()
+        state = 0
+        for ch in text.lower():
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                seen.update(out[state])
+
+        found: Dict[str, List[str]] = {}
+        for kw_id in sorted(seen):
+            for label in self._keyword_labels[kw_id]:
+                found.setdefault(label, []).append(self._keywords[kw_id])
+        return found
+
+    def rank(
+        self,
+        text: str,
+        labels: Iterable[str] = None,
+        found: Dict[str, List[str]] = None
+    ) -> List[Tuple[str, int]]:
+        """(label, score) pairs for every matched label, best first; pass `found` to reuse a `matches(text)` result"""
+        if found is None:
+            found = self.matches(text)
+        if labels is not None:
+            wanted = set(labels)
+            found = {label: kws for label, kws in found.items() if label in wanted}
+        return sorted(
+            ((label, len(kws)) for label, kws in found.items()),
+            key=lambda item: (-item[1], self._label_order[item[0]])
+        )
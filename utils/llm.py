@@ -1,20 +1,174 @@
 import os
+import threading
+from typing import Callable, Dict, Optional
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.output_parsers import JsonOutputParser
 from pydantic import BaseModel, Field
+from utils.cache import get_result_cache, make_key
+from utils.keyword_router import KeywordRouter
+from utils.search import tokenize
 
 # Check for API key once at module load
 _API_KEY_PRESENT = bool(os.environ.get("GOOGLE_API_KEY"))
 if not _API_KEY_PRESENT:
     print("⚠️ Warning: GOOGLE_API_KEY not found. LLM features will use fallback mode.")
 
+# Process-wide LLM client: one instance keeps its transport (and pooled
+# keep-alive connections) alive across requests
+_llm = None
+_llm_lock = threading.Lock()
+
 def get_llm():
-    """Get the LLM instance. Raises early if no API key."""
+    """Get the shared LLM instance. Raises early if no API key."""
+    global _llm
     if not os.environ.get("GOOGLE_API_KEY"):
         raise ValueError("GOOGLE_API_KEY not configured")
-    return ChatGoogleGenerativeAI(model="gemini-2.5-flash-lite", temperature=0)
+    if _llm is None:
+        with _llm_lock:
+            if _llm is None:
+                _llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash-lite", temperature=0)
+    return _llm
+
+
+class ChainRegistry:
+    """
+    Builds each prompt | llm | parser chain once per process and reuses it.
+    Tracks how often each chain was built vs. reused.
+    """
+    
+    def __init__(self):
+        self._builders: Dict[str, Callable] = {}
+        self._chains = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+    
+    def register(self, name: str):
+        """Decorator registering a zero-argument chain builder under `name`"""
+        def decorator(builder: Callable) -> Callable:
+            self._builders[name] = builder
+            self._stats[name] = {"builds": 0, "reuses": 0}
+            return builder
+        return decorator
+    
+    def get(self, name: str):
+        """Return the chain for `name`, building it on first use"""
+        with self._lock:
+            chain = self._chains.get(name)
+            if chain is None:
+                chain = self._builders[name]()
+                self._chains[name] = chain
+                self._stats[name]["builds"] += 1
+            else:
+                self._stats[name]["reuses"] += 1
+        return chain
+    
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Build/reuse counts per chain"""
+        with self._lock:
+            return {name: dict(counts) for name, counts in self._stats.items()}
+    
+    def reset(self):
+        """Drop all built chains and the shared client (e.g. after an API key change)"""
+        global _llm
+        with self._lock:
+            self._chains.clear()
+            for counts in self._stats.values():
+                counts["builds"] = counts["reuses"] = 0
+        with _llm_lock:
+            _llm = None
+
+
+chain_registry = ChainRegistry()
+
+
+def get_chain(name: str):
+    """Get a prebuilt chain from the process-wide registry"""
+    return chain_registry.get(name)
+
+
+def get_chain_stats() -> Dict[str, Dict[str, int]]:
+    """Report build and reuse counts for every registered chain"""
+    return chain_registry.stats()
+
+
+class _LLMCall:
+    """
+    One chain call, with everything the sync and async entry points share:
+    the offline fallback, the result-cache lookup and store, post-processing
+    and the error fallback. They differ only in invoke vs. await ainvoke.
+    """
+    
+    def __init__(
+        self,
+        chain: str,
+        inputs: dict,
+        fallback,
+        offline: bool = False,
+        offline_note: str = None,
+        cache_key: str = None,
+        cache_note: Callable[[dict], str] = None,
+        error_label: str = "LLM Error",
+        error_fallback=None,
+        finish: Callable = None
+    ):
+        self.chain = chain
+        self.inputs = inputs
+        self.fallback = fallback
+        self.offline = offline or not _API_KEY_PRESENT  # skip the LLM and answer with the fallback
+        self.offline_note = offline_note
+        self.cache_key = cache_key
+        self.cache_note = cache_note
+        self.error_label = error_label
+        self.error_fallback = fallback if error_fallback is None else error_fallback
+        self.finish = finish
+    
+    def start(self):
+        """(True, result) when no LLM call is needed - offline or a cache hit - else (False, None)"""
+        if self.offline:
+            if self.offline_note:
+                print(self.offline_note)
+            return True, self.fallback
+        if self.cache_key:
+            cached = get_result_cache().get(self.cache_key)
+            if cached is not None:
+                if self.cache_note:
+                    print(self.cache_note(cached))
+                return True, cached
+        return False, None
+    
+    def done(self, result):
+        """Post-process the LLM result and cache it"""
+        if self.finish:
+            result = self.finish(result)
+        if self.cache_key:
+            get_result_cache().set(self.cache_key, result)
+        return result
+    
+    def failed(self, error: Exception):
+        print(f"{self.error_label}: {error}")
+        return self.error_fallback
+
+
+def _invoke(call: _LLMCall):
+    finished, result = call.start()
+    if finished:
+        return result
+    try:
+        return call.done(get_chain(call.chain).invoke(call.inputs))
+    except Exception as e:
+        return call.failed(e)
+
+
+async def _ainvoke(call: _LLMCall):
+    finished, result = call.start()
+    if finished:
+        return result
+    try:
+        return call.done(await get_chain(call.chain).ainvoke(call.inputs))
+    except Exception as e:
+        return call.failed(e)
 
 
 class RequestAnalysis(BaseModel):
@@ -24,117 +178,283 @@ class RequestAnalysis(BaseModel):
     entities: dict = Field(description="Extracted entities like user_id, device, error_code, software_name")
 
 
+# Keyword rules for the offline fallback, in priority order (ties go to the earlier label)
+INTENT_KEYWORDS = {
+    "EscalationAgent": ["angry", "furious", "frustrated", "hate", "worst", "help me now"],
+    "LogAnalysisAgent": ["log", "error", "security", "suspicious", "hack", "breach", "attack"],
+    "WorkflowAgent": ["reset", "unlock", "mfa", "vpn status", "reboot", "order", "install", "provision"],
+    "KnowledgeAgent": ["policy", "password", "what is", "how do", "where", "when", "wifi", "network", "expense", "benefit"],
+}
+URGENCY_KEYWORDS = ["urgent", "critical", "emergency", "now", "asap"]
+
+TOOL_KEYWORDS = {
+    "check_vpn_status": ["vpn", "connect", "network"],
+    "unlock_account": ["unlock", "locked", "lockout"],
+    "reset_mfa": ["mfa", "2fa", "authenticator", "two-factor"],
+    "provision_license": ["license", "software", "install"],
+    "check_hardware_eligibility": ["laptop", "refresh", "upgrade", "old"],
+    "order_peripheral": ["mouse", "keyboard", "monitor", "peripheral", "order"],
+    "reboot_server": ["reboot", "server", "restart"],
+    "onboard_user": ["onboard", "new hire", "new employee"],
+    "offboard_user": ["offboard", "terminate", "disable account", "leaving"],
+    "grant_temp_admin": ["admin", "sudo", "elevated", "temporary access"],
+}
+
+# Compiled once; one pass over the message scores every label
+_intent_router = KeywordRouter({**INTENT_KEYWORDS, "urgent": URGENCY_KEYWORDS})
+_tool_router = KeywordRouter(TOOL_KEYWORDS)
+
+
+def _keyword_analysis(message: str) -> dict:
+    """Keyword-based intent/sentiment/urgency detection used when the LLM is unavailable."""
+    matches = _intent_router.matches(message)
+    ranked = _intent_router.rank(message, labels=INTENT_KEYWORDS, found=matches)
+    
+    fallback_intent = ranked[0][0] if ranked else "KnowledgeAgent"
+    fallback_sentiment = "Frustrated" if "EscalationAgent" in matches else "Neutral"
+    fallback_urgency = "High" if "urgent" in matches else "Medium"
+    
+    return {
+        "intent": fallback_intent,
+        "sentiment": fallback_sentiment,
+        "urgency": fallback_urgency,
+        "entities": {},
+        "candidates": [{"intent": intent, "score": score} for intent, score in ranked]
+    }
+
+
+@chain_registry.register("analyze_request")
+def _build_analysis_chain():
+    parser = JsonOutputParser(pydantic_object=RequestAnalysis)
+    
+    template = """
+    You are an AI Intake Specialist for IT Support. Analyze the user's message.
+    
+    1. **Classify Intent**:
+       - WorkflowAgent: Actionable technical tasks (VPN, Hardware, Software, Identity, Network).
+       - LogAnalysisAgent: Logs, errors, crashes, security alerts (ransomware, phishing).
+       - KnowledgeAgent: Policy questions, "how to", general info.
+       - EscalationAgent: Human request, high frustration, complex unknown issues.
+       
+    2. **Analyze Sentiment**: Positive, Neutral, Negative, or Frustrated.
+    3. **Assess Urgency**: Low, Medium, High, Critical.
+    4. **Extract Entities**: user_id, device, software, error codes, location, etc.
+    
+    User Message: {message}
+    
+    {format_instructions}
+    """
+    
+    prompt = ChatPromptTemplate.from_template(template, partial_variables={"format_instructions": parser.get_format_instructions()})
+    return prompt | get_llm() | parser
+
+
+def _analysis_call(message: str) -> _LLMCall:
+    fallback = _keyword_analysis(message)
+    return _LLMCall(
+        "analyze_request", {"message": message}, fallback,
+        offline_note=f"[Fallback] Intent: {fallback['intent']} (keyword-based)",
+        cache_key=make_key("analyze_request", message),
+        cache_note=lambda cached: f"[Cache] Intent: {cached.get('intent')} (cached)",
+        error_label="LLM Analysis Error"
+    )
+
+
 def analyze_request(message: str) -> dict:
     """
     Analyzes user request for intent, sentiment, and entities.
     Falls back to keyword matching if LLM unavailable.
     """
-    # Keyword-based fallback for when LLM is unavailable
-    message_lower = message.lower()
-    
-    # Keyword-based intent detection
-    if any(word in message_lower for word in ["angry", "furious", "frustrated", "hate", "worst", "help me now"]):
-        fallback_intent = "EscalationAgent"
-        fallback_sentiment = "Frustrated"
-    elif any(word in message_lower for word in ["log", "error", "security", "suspicious", "hack", "breach", "attack"]):
-        fallback_intent = "LogAnalysisAgent"
-        fallback_sentiment = "Neutral"
-    elif any(word in message_lower for word in ["reset", "unlock", "mfa", "vpn status", "reboot", "order", "install", "provision"]):
-        fallback_intent = "WorkflowAgent"
-        fallback_sentiment = "Neutral"
-    elif any(word in message_lower for word in ["policy", "password", "what is", "how do", "where", "when", "wifi", "network", "expense", "benefit"]):
-        fallback_intent = "KnowledgeAgent"
-        fallback_sentiment = "Neutral"
-    else:
-        fallback_intent = "KnowledgeAgent"
-        fallback_sentiment = "Neutral"
-    
-    # Urgency detection
-    if any(word in message_lower for word in ["urgent", "critical", "emergency", "now", "asap"]):
-        fallback_urgency = "High"
-    else:
-        fallback_urgency = "Medium"
-    
-    fallback = {
-        "intent": fallback_intent,
-        "sentiment": fallback_sentiment,
-        "urgency": fallback_urgency,
-        "entities": {}
-    }
+    return _invoke(_analysis_call(message))
+
+
+async def aanalyze_request(message: str) -> dict:
+    """Async variant of analyze_request (non-blocking LLM call)."""
+    return await _ainvoke(_analysis_call(message))
+
+
+# Rolling summary limits
+SUMMARY_TOKEN_BUDGET = int(os.environ.get("SUMMARY_TOKEN_BUDGET", 60))  # words
+SUMMARY_MIN_TOKENS = 4        # shorter messages ("thanks", "ok that worked") never re-summarize
+SUMMARY_TOPIC_OVERLAP = 0.5   # share of message terms already in the summary = same topic
+SUMMARY_MAX_PENDING = 6       # unsummarized messages that force an update even without a topic change
+
+
+class IntakeAnalysis(RequestAnalysis):
+    summary: str = Field(description="Updated summary of the whole conversation, focused on the user's issue and any actions taken")
+
+
+def _format_turns(messages: list, summarized: int = 0) -> str:
+    """Render every message not yet folded into the summary (the first `summarized` are) for a prompt."""
+    return "\n".join(f"{m['role'].upper()}: {m['content'][:200]}" for m in messages[summarized:])
+
+
+def clip_summary(summary: str, budget: int = SUMMARY_TOKEN_BUDGET) -> str:
+    """Keep the summary within `budget` words, dropping the oldest ones first."""
+    words = summary.split()
+    if len(words) <= budget:
+        return summary.strip()
+    return "... " + " ".join(words[-budget:])
+
+
+def summary_needs_update(previous_summary: str, message: str) -> bool:
+    """
+    True when the new message is worth an LLM summary update: it is not a
+    short acknowledgement and it brings in terms the summary doesn't cover yet.
+    """
+    terms = set(tokenize(message))
+    if len(terms) < SUMMARY_MIN_TOKENS:
+        return False
+    if not previous_summary:
+        return True
+    overlap = len(terms & set(tokenize(previous_summary))) / len(terms)
+    return overlap < SUMMARY_TOPIC_OVERLAP
+
+
+def _fallback_summary(messages: list, previous_summary: str = "", summarized: int = 0) -> str:
+    """Cheap summary used when the LLM is unavailable: append the unsummarized user messages."""
+    topics = [f"Previous topic: {m['content'][:100]}" for m in messages[summarized:-1] if m['role'] == "user"]
+    if not topics:
+        return previous_summary
+    return clip_summary(" | ".join([previous_summary] + topics if previous_summary else topics))
+
+
+@chain_registry.register("analyze_intake")
+def _build_intake_chain():
+    parser = JsonOutputParser(pydantic_object=IntakeAnalysis)
     
-    # Try LLM if available
-    if not _API_KEY_PRESENT:
-        print(f"[Fallback] Intent: {fallback_intent} (keyword-based)")
-        return fallback
+    template = """
+    You are an AI Intake Specialist for IT Support. Analyze the latest user message
+    in the context of the conversation so far.
     
-    try:
-        llm = get_llm()
-        parser = JsonOutputParser(pydantic_object=RequestAnalysis)
-        
-        template = """
-        You are an AI Intake Specialist for IT Support. Analyze the user's message.
-        
-        1. **Classify Intent**:
-           - WorkflowAgent: Actionable technical tasks (VPN, Hardware, Software, Identity, Network).
-           - LogAnalysisAgent: Logs, errors, crashes, security alerts (ransomware, phishing).
-           - KnowledgeAgent: Policy questions, "how to", general info.
-           - EscalationAgent: Human request, high frustration, complex unknown issues.
-           
-        2. **Analyze Sentiment**: Positive, Neutral, Negative, or Frustrated.
-        3. **Assess Urgency**: Low, Medium, High, Critical.
-        4. **Extract Entities**: user_id, device, software, error codes, location, etc.
-        
-        User Message: {message}
-        
-        {format_instructions}
-        """
-        
-        prompt = ChatPromptTemplate.from_template(template, partial_variables={"format_instructions": parser.get_format_instructions()})
-        chain = prompt | llm | parser
-        return chain.invoke({"message": message})
-        
-    except Exception as e:
-        print(f"LLM Analysis Error: {e}")
-        return fallback
+    1. **Classify Intent** of the latest message:
+       - WorkflowAgent: Actionable technical tasks (VPN, Hardware, Software, Identity, Network).
+       - LogAnalysisAgent: Logs, errors, crashes, security alerts (ransomware, phishing).
+       - KnowledgeAgent: Policy questions, "how to", general info.
+       - EscalationAgent: Human request, high frustration, complex unknown issues.
+       
+    2. **Analyze Sentiment**: Positive, Neutral, Negative, or Frustrated.
+    3. **Assess Urgency**: Low, Medium, High, Critical.
+    4. **Extract Entities**: user_id, device, software, error codes, location, etc.
+    5. **Update the Summary**: fold the new turns into the summary of earlier turns,
+       in at most {budget} words (focus on the user's issue and any actions taken).
+    
+    Summary of Earlier Turns: {summary}
+    
+    New Turns:
+    {turn}
+    
+    Latest User Message: {message}
+    
+    {format_instructions}
+    """
+    
+    prompt = ChatPromptTemplate.from_template(template, partial_variables={
+        "format_instructions": parser.get_format_instructions(),
+        "budget": str(SUMMARY_TOKEN_BUDGET)
+    })
+    return prompt | get_llm() | parser
+
 
+def _intake_call(messages: list, previous_summary: str, summarized: int) -> _LLMCall:
+    fallback = _keyword_analysis(messages[-1]['content'])
+    fallback["summary"] = _fallback_summary(messages, previous_summary, summarized)
+    
+    def finish(result: dict) -> dict:
+        result["summary"] = clip_summary(result.get("summary") or previous_summary)
+        print(f"Conversation Summary: {result['summary'][:100]}...")
+        return result
+    
+    inputs = {
+        "summary": previous_summary or "(none yet)",
+        "turn": _format_turns(messages, summarized),
+        "message": messages[-1]['content']
+    }
+    return _LLMCall(
+        "analyze_intake", inputs, fallback,
+        offline_note=f"[Fallback] Intent: {fallback['intent']} (keyword-based, fused intake)",
+        error_label="LLM Intake Error",
+        finish=finish
+    )
 
-def mock_llm_rag_response(query: str, context: str) -> str:
+
+def analyze_intake(messages: list, previous_summary: str = "", summarized: int = 0) -> dict:
     """
-    Generates a RAG response using Gemini.
-    Falls back to context-based response if LLM unavailable.
+    Fused intake for multi-turn conversations: classifies the latest message
+    and folds every message after the first `summarized` (those the summary
+    already covers) into the rolling summary in a single LLM call.
+    Falls back to keyword matching if LLM unavailable.
     """
-    # Fallback: return most relevant context snippet
-    if not _API_KEY_PRESENT or not context.strip():
-        if context.strip():
-            # Return first 500 chars of context as the answer
-            snippet = context[:500].strip()
-            if len(context) > 500:
-                snippet += "..."
-            return f"Based on our documentation:\n\n{snippet}\n\n🟡 *Confidence: 60%* (LLM unavailable - showing raw docs)"
-        return "I don't have information about this in my knowledge base. Please contact IT support at support@company.com or (555) 123-4567.\n\n🔴 *Confidence: 20%*"
+    return _invoke(_intake_call(messages, previous_summary, summarized))
+
+
+async def aanalyze_intake(messages: list, previous_summary: str = "", summarized: int = 0) -> dict:
+    """Async variant of analyze_intake (non-blocking LLM call)."""
+    return await _ainvoke(_intake_call(messages, previous_summary, summarized))
+
+
+@chain_registry.register("rag_response")
+def _build_rag_chain():
+    template = """
+    You are a helpful IT Support Assistant. Answer the user's question based ONLY on the following context.
+    If the answer is not in the context, say you don't know and suggest escalating.
     
-    try:
-        llm = get_llm()
-        template = """
-        You are a helpful IT Support Assistant. Answer the user's question based ONLY on the following context.
-        If the answer is not in the context, say you don't know and suggest escalating.
-        
-        Context:
-        {context}
-        
-        Question: {query}
-        """
-        prompt = ChatPromptTemplate.from_template(template)
-        chain = prompt | llm | StrOutputParser()
-        return chain.invoke({"context": context, "query": query})
-        
-    except Exception as e:
-        print(f"LLM Error: {e}")
-        # Better fallback - show context snippet
+    Context:
+    {context}
+    
+    Question: {query}
+    """
+    prompt = ChatPromptTemplate.from_template(template)
+    # Tagged so the UI streams these tokens straight to the user
+    return (prompt | get_llm() | StrOutputParser()).with_config(tags=["user_facing"])
+
+
+def _rag_fallback(context: str, failed: bool = False) -> str:
+    """Context-based answer when the LLM is unavailable (or, with `failed`, when the call itself failed)"""
+    if failed:
         if context.strip():
             snippet = context[:300].strip()
             return f"Here's what I found in our docs:\n\n{snippet}\n\n⚠️ *Please verify this information with IT support.*"
         return "I'm having trouble processing your request. Please contact IT support at (555) 123-4567.\n\n🔴 *Confidence: 20%*"
+    if context.strip():
+        # Return first 500 chars of context as the answer
+        snippet = context[:500].strip()
+        if len(context) > 500:
+            snippet += "..."
+        return f"Based on our documentation:\n\n{snippet}\n\n🟡 *Confidence: 60%* (LLM unavailable - showing raw docs)"
+    return "I don't have information about this in my knowledge base. Please contact IT support at support@company.com or (555) 123-4567.\n\n🔴 *Confidence: 20%*"
+
+
+def _rag_call(query: str, context: str, fallback: Optional[Callable[..., str]]) -> _LLMCall:
+    return _LLMCall(
+        "rag_response", {"context": context, "query": query},
+        fallback(context) if fallback else None,
+        offline=not context.strip(),
+        error_fallback=fallback(context, failed=True) if fallback else None
+    )
+
+
+def mock_llm_rag_response(
+    query: str,
+    context: str,
+    fallback: Optional[Callable[..., str]] = _rag_fallback
+) -> Optional[str]:
+    """
+    Generates a RAG response using Gemini through the user_facing rag chain,
+    so its tokens stream to the chat. Not cached: every call is a Gemini call.
+    Without an LLM (or if the call fails) returns `fallback(context, failed)`,
+    or None when `fallback` is None.
+    """
+    return _invoke(_rag_call(query, context, fallback))
+
+
+async def amock_llm_rag_response(
+    query: str,
+    context: str,
+    fallback: Optional[Callable[..., str]] = _rag_fallback
+) -> Optional[str]:
+    """Async variant of mock_llm_rag_response (non-blocking LLM call)."""
+    return await _ainvoke(_rag_call(query, context, fallback))
 
 
 class ToolSelection(BaseModel):
@@ -143,65 +463,61 @@ class ToolSelection(BaseModel):
     reasoning: str = Field(description="Why this tool was selected")
 
 
-def select_tool(message: str, tools_description: str) -> dict:
-    """
-    Selects the best tool to handle the user's request.
-    Falls back to keyword matching if LLM unavailable.
+@chain_registry.register("select_tool")
+def _build_tool_chain():
+    parser = JsonOutputParser(pydantic_object=ToolSelection)
+    
+    template = """
+    You are an AI Workflow Orchestrator. Select the appropriate tool to handle the user's request.
+    
+    Available Tools:
+    {tools_description}
+    
+    User Message: {message}
+    
+    Return the tool name and arguments. If no tool matches, return 'None'.
+    
+    {format_instructions}
     """
-    message_lower = message.lower()
-    
-    # Keyword-based tool selection fallback
-    tool_keywords = {
-        "check_vpn_status": ["vpn", "connect", "network"],
-        "unlock_account": ["unlock", "locked", "lockout"],
-        "reset_mfa": ["mfa", "2fa", "authenticator", "two-factor"],
-        "provision_license": ["license", "software", "install"],
-        "check_hardware_eligibility": ["laptop", "refresh", "upgrade", "old"],
-        "order_peripheral": ["mouse", "keyboard", "monitor", "peripheral", "order"],
-        "reboot_server": ["reboot", "server", "restart"],
-        "onboard_user": ["onboard", "new hire", "new employee"],
-        "offboard_user": ["offboard", "terminate", "disable account", "leaving"],
-        "grant_temp_admin": ["admin", "sudo", "elevated", "temporary access"],
-    }
     
-    # Find matching tool by keywords
-    fallback_tool = "None"
-    for tool_name, keywords in tool_keywords.items():
-        if any(kw in message_lower for kw in keywords):
-            fallback_tool = tool_name
-            break
+    prompt = ChatPromptTemplate.from_template(template, partial_variables={"format_instructions": parser.get_format_instructions()})
+    return prompt | get_llm() | parser
+
+
+def _keyword_tool_selection(message: str) -> dict:
+    """Keyword-based tool selection used when the LLM is unavailable."""
+    # Keyword-based tool selection fallback: rank every tool in one pass
+    ranked = _tool_router.rank(message)
+    fallback_tool = ranked[0][0] if ranked else "None"
     
-    fallback = {
+    return {
         "tool_name": fallback_tool,
         "arguments": {},
-        "reasoning": "Keyword-based selection (LLM unavailable)"
+        "reasoning": "Keyword-based selection (LLM unavailable)",
+        "candidates": [{"tool_name": tool, "score": score} for tool, score in ranked]
     }
-    
-    if not _API_KEY_PRESENT:
-        print(f"[Fallback] Tool: {fallback_tool} (keyword-based)")
-        return fallback
-    
-    try:
-        llm = get_llm()
-        parser = JsonOutputParser(pydantic_object=ToolSelection)
-        
-        template = """
-        You are an AI Workflow Orchestrator. Select the appropriate tool to handle the user's request.
-        
-        Available Tools:
-        {tools_description}
-        
-        User Message: {message}
-        
-        Return the tool name and arguments. If no tool matches, return 'None'.
-        
-        {format_instructions}
-        """
-        
-        prompt = ChatPromptTemplate.from_template(template, partial_variables={"format_instructions": parser.get_format_instructions()})
-        chain = prompt | llm | parser
-        return chain.invoke({"message": message, "tools_description": tools_description})
-        
-    except Exception as e:
-        print(f"LLM Tool Selection Error: {e}")
-        return fallback
+
+
+def _tool_call(message: str, tools_description: str) -> _LLMCall:
+    fallback = _keyword_tool_selection(message)
+    # Key includes the tool catalog so a changed registry never serves stale picks
+    return _LLMCall(
+        "select_tool", {"message": message, "tools_description": tools_description}, fallback,
+        offline_note=f"[Fallback] Tool: {fallback['tool_name']} (keyword-based)",
+        cache_key=make_key("select_tool", message, tools_description),
+        cache_note=lambda cached: f"[Cache] Tool: {cached.get('tool_name')} (cached)",
+        error_label="LLM Tool Selection Error"
+    )
+
+
+def select_tool(message: str, tools_description: str) -> dict:
+    """
+    Selects the best tool to handle the user's request.
+    Falls back to keyword matching if LLM unavailable.
+    """
+    return _invoke(_tool_call(message, tools_description))
+
+
+async def aselect_tool(message: str, tools_description: str) -> dict:
+    """Async variant of select_tool (non-blocking LLM call)."""
+    return await _ainvoke(_tool_call(message, tools_description))
@@ -0,0 +1,91 @@
+"""
+Constant-Memory Dashboard Metrics
+
+Fixed-size streaming histograms and rolling-window rates for the sidebar.
+Every update is O(1) in the number of observations, and memory stays flat no
+matter how long a session lives.
+"""
+
+import bisect
+import math
+from collections import deque
+from typing import List
+
+
+class StreamingHistogram:
+    """
+    Fixed-bucket histogram with approximate quantiles.
+    Values outside the edges are clamped into the first/last bucket.
+    """
+
+    def __init__(self, edges: List[float]):
+        self.edges = list(edges)
+        self.counts = [0] * (len(self.edges) - 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    @classmethod
+    def log_spaced(cls, low: float = 0.01, high: float = 600.0, buckets_per_decade: int = 20) -> "StreamingHistogram":
+        """Buckets with constant relative width, good for latencies"""
+        n = int(math.ceil(math.log10(high / low) * buckets_per_decade))
+        return cls([low * 10 ** (i / buckets_per_decade) for i in range(n + 1)])
+
+    @classmethod
+    def linear(cls, low: float = 0.0, high: float = 1.0, buckets: int = 100) -> "StreamingHistogram":
+        """Equal-width buckets, good for bounded scores like confidence"""
+        step = (high - low) / buckets
+        return cls([low + i * step for i in range(buckets + 1)])
+
+    def add(self, value: float):
+        i = bisect.bisect_right(self.edges, value) - 1
+        i = min(max(i, 0), len(self.counts) - 1)
+        self.counts[i] += 1
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        """Approximate q-quantile (0..1), interpolated within the bucket"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            if c and seen + c >= target:
+                lo, hi = self.edges[i], self.edges[i + 1]
+                value = lo + (hi - lo) * (target - seen) / c
+                return min(max(value, self.min), self.max)
+            seen += c
+        return self.max
+
+    def percentiles(self) -> dict:
+        return {"p50": self.quantile(0.50), "p95": self.quantile(0.95), "p99": self.quantile(0.99)}
+
+
+class RollingRate:
+    """Fraction of True events over the last `window` observations"""
+
+    def __init__(self, window: int = 100):
+        self.window = deque(maxlen=window)
+        self.hits = 0
+
+    def add(self, hit: bool):
+        if len(self.window) == self.window.maxlen:
+            self.hits -= self.window[0]
+        hit = int(bool(hit))
+        self.window.append(hit)
+        self.hits += hit
+
+    @property
+    def rate(self) -> float:
+        return self.hits / len(self.window) if self.window else 0.0
+
+    def __len__(self) -> int:
+        return len(self.window)
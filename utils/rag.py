@@ -1,43 +1,261 @@
+import hashlib
 import os
+import threading
+import time
+from typing import List, Tuple, Union
 from langchain_community.vectorstores import Chroma
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 
 # Define the persistence directory
 PERSIST_DIRECTORY = "./chroma_db"
 
+# Vector store backend: "chroma" or "mmap" (memory-mapped index in VECTOR_INDEX_DIRECTORY)
+VECTOR_STORE_BACKEND = os.environ.get("VECTOR_STORE_BACKEND", "chroma").lower()
+VECTOR_INDEX_DIRECTORY = os.environ.get("VECTOR_INDEX_DIRECTORY", "./vector_index")
+VECTOR_INDEX_COMPACT_RATIO = float(os.environ.get("VECTOR_INDEX_COMPACT_RATIO", 0.3))  # dead-row share that triggers compaction
+VECTOR_INDEX_IVF = os.environ.get("VECTOR_INDEX_IVF", "0") != "0"  # (re)train IVF after each sync with changes
+
+# Ingestion settings
+CHUNK_SIZE = int(os.environ.get("RAG_CHUNK_SIZE", 1000))        # characters
+CHUNK_OVERLAP = int(os.environ.get("RAG_CHUNK_OVERLAP", 100))   # characters
+INGEST_BATCH_SIZE = int(os.environ.get("RAG_BATCH_SIZE", 64))   # chunks per upsert
+
+# Embeddings backend: "hashing", "gemini" or "fake"
+EMBEDDING_BACKEND = os.environ.get("EMBEDDING_BACKEND", "hashing").lower()
+
+def vector_store_directory() -> str:
+    """Directory of the store selected by VECTOR_STORE_BACKEND"""
+    return VECTOR_INDEX_DIRECTORY if VECTOR_STORE_BACKEND == "mmap" else PERSIST_DIRECTORY
+
 def get_embeddings():
     """
-    Returns GoogleGenerativeAIEmbeddings.
-    Requires GOOGLE_API_KEY environment variable.
+    Returns the embeddings backend selected by EMBEDDING_BACKEND:
+    - "hashing" (default): deterministic local hashing vectorizer, no network or quota
+    - "gemini": GoogleGenerativeAIEmbeddings, requires GOOGLE_API_KEY
+    - "fake": random FakeEmbeddings (legacy)
     """
-    if not os.environ.get("GOOGLE_API_KEY"):
-        print("Warning: GOOGLE_API_KEY not found. RAG may fail.")
+    if EMBEDDING_BACKEND == "gemini":
+        if not os.environ.get("GOOGLE_API_KEY"):
+            print("Warning: GOOGLE_API_KEY not found. RAG may fail.")
+        return GoogleGenerativeAIEmbeddings(model="models/embedding-001")
+    
+    if EMBEDDING_BACKEND == "fake":
+        from langchain_community.embeddings import FakeEmbeddings
+        print("Using FakeEmbeddings (random vectors).")
+        return FakeEmbeddings(size=768) # 768 for Gemini embedding-001 compatibility if needed, or 1536
     
-    # Fallback to FakeEmbeddings due to API Quota limits (429)
-    # return GoogleGenerativeAIEmbeddings(model="models/embedding-001")
-    from langchain_community.embeddings import FakeEmbeddings
-    print("Using FakeEmbeddings due to API quota limits.")
-    return FakeEmbeddings(size=768) # 768 for Gemini embedding-001 compatibility if needed, or 1536
+    # Local fallback: Gemini embeddings hit API quota limits (429)
+    from utils.embeddings import HashingEmbeddings, EMBEDDING_IDF_PATH
+    # The IDF is fitted on this store's corpus, so it lives with the store
+    idf_path = EMBEDDING_IDF_PATH or os.path.join(vector_store_directory(), "hashing_idf.npy")
+    return HashingEmbeddings(n_features=768, idf_path=idf_path)
 
-def get_vector_store():
+# Process-wide store handle, opened lazily and shared across threads
+_vector_store = None
+_vector_store_lock = threading.RLock()
+_warmup_thread = None
+
+def _open_vector_store():
     """
-    Returns the Chroma vector store.
+    Opens the vector store selected by VECTOR_STORE_BACKEND.
     """
     embeddings = get_embeddings()
+    if VECTOR_STORE_BACKEND == "mmap":
+        from utils.vector_index import MmapVectorStore
+        return MmapVectorStore(persist_directory=vector_store_directory(), embedding_function=embeddings)
+    
     vector_store = Chroma(
-        persist_directory=PERSIST_DIRECTORY,
+        persist_directory=vector_store_directory(),
         embedding_function=embeddings,
         collection_name="it_support_knowledge"
     )
     return vector_store
 
-def add_documents(documents: list):
+def get_vector_store():
     """
-    Adds documents to the vector store.
+    Returns the shared vector store, opening it on first use.
     """
+    global _vector_store
+    if _vector_store is None:
+        with _vector_store_lock:
+            if _vector_store is None:
+                _vector_store = _open_vector_store()
+    return _vector_store
+
+def reset_vector_store():
+    """Drop the shared handle (e.g. after rebuilding the store on disk)"""
+    global _vector_store
+    with _vector_store_lock:
+        _vector_store = None
+
+def _warm_up(query: str):
+    try:
+        store = get_vector_store()
+        store.similarity_search(query, k=1)
+        print("[RAG] Vector store warmed up")
+    except Exception as e:
+        print(f"[RAG] Warm-up failed: {e}")
+
+def warm_up_vector_store(query: str = "IT support") -> threading.Thread:
+    """
+    Opens the store and runs a first query in a background thread so the
+    first real request does not pay for loading the index.
+    """
+    global _warmup_thread
+    with _vector_store_lock:
+        if _warmup_thread is None:
+            _warmup_thread = threading.Thread(target=_warm_up, args=(query,), name="rag-warmup", daemon=True)
+            _warmup_thread.start()
+    return _warmup_thread
+
+def embedding_fingerprint(embeddings) -> str:
+    """
+    Identifies the vector space of an embeddings backend. Stored with every
+    chunk; chunks embedded under a different fingerprint are re-embedded.
+    """
+    fingerprint = getattr(embeddings, "fingerprint", None)
+    if fingerprint:
+        return fingerprint
+    detail = getattr(embeddings, "model", None) or getattr(embeddings, "size", None) or ""
+    return f"{type(embeddings).__name__}:{detail}"
+
+def content_hash(text: str) -> str:
+    """Stable hash of a chunk's content"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def chunk_text(text: str, chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP) -> List[str]:
+    """
+    Splits text into overlapping chunks of at most `chunk_size` characters,
+    breaking on whitespace where possible.
+    """
+    text = text.strip()
+    if len(text) <= chunk_size:
+        return [text] if text else []
+    overlap = min(overlap, chunk_size // 2)
+    
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + chunk_size, len(text))
+        if end < len(text):
+            space = text.rfind(" ", start + overlap + 1, end)
+            if space != -1:
+                end = space
+        chunks.append(text[start:end].strip())
+        if end >= len(text):
+            break
+        start = end - overlap
+        # Start the next chunk on a word boundary
+        space = text.find(" ", start, end)
+        if space != -1:
+            start = space + 1
+    return chunks
+
+def _batches(items: list, size: int):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def ingest_documents(
+    documents: List[Union[str, Tuple[str, str]]],
+    batch_size: int = INGEST_BATCH_SIZE,
+    chunk_size: int = CHUNK_SIZE,
+    chunk_overlap: int = CHUNK_OVERLAP,
+    prune: bool = False
+) -> dict:
+    """
+    Incrementally ingests documents into the vector store.
+    
+    Documents are plain strings or (source_id, text) tuples; plain strings use
+    their content hash as source id. Each chunk gets the ID `<source_id>:<n>`
+    and its content hash and embedding fingerprint in metadata, so re-running
+    a sync skips unchanged chunks, upserts changed ones (or ones embedded by
+    another backend / IDF) in batches and deletes chunks that no longer
+    exist. With `prune=True`, sources missing from `documents` are removed too.
+    
+    Returns throughput stats.
+    """
+    started = time.time()
     vector_store = get_vector_store()
-    vector_store.add_texts(documents)
-    # vector_store.persist() # Chroma 0.4+ persists automatically
+    
+    ids, texts, metadatas = [], [], []
+    source_ids = []
+    for doc in documents:
+        source_id, text = doc if isinstance(doc, tuple) else (content_hash(doc)[:16], doc)
+        source_ids.append(source_id)
+        for n, chunk in enumerate(chunk_text(text, chunk_size, chunk_overlap)):
+            ids.append(f"{source_id}:{n}")
+            texts.append(chunk)
+            metadatas.append({"source": source_id, "chunk": n, "content_hash": content_hash(chunk)})
+    
+    # Look up what is already stored for these sources
+    existing = {}
+    for batch in _batches(source_ids, batch_size):
+        found = vector_store.get(where={"source": {"$in": batch}}, include=["metadatas"])
+        for chunk_id, meta in zip(found["ids"], found["metadatas"]):
+            meta = meta or {}
+            existing[chunk_id] = (meta.get("content_hash"), meta.get("embedding"))
+    if prune:
+        found = vector_store.get(include=["metadatas"])
+        known = set(source_ids)
+        for chunk_id, meta in zip(found["ids"], found["metadatas"]):
+            if (meta or {}).get("source") not in known:
+                existing[chunk_id] = None
+    
+    # Local hashing embeddings fit their IDF weights on the first ingested corpus
+    embeddings = vector_store.embeddings
+    if getattr(embeddings, "is_fitted", True) is False and texts:
+        embeddings.fit(texts)
+    fingerprint = embedding_fingerprint(embeddings)
+    for meta in metadatas:
+        meta["embedding"] = fingerprint
+    
+    changed = [
+        i for i, chunk_id in enumerate(ids)
+        if existing.get(chunk_id) != (metadatas[i]["content_hash"], fingerprint)
+    ]
+    stale = sorted(set(existing) - set(ids))
+    
+    batches = 0
+    with _vector_store_lock:
+        for batch in _batches(changed, batch_size):
+            vector_store.add_texts(
+                [texts[i] for i in batch],
+                metadatas=[metadatas[i] for i in batch],
+                ids=[ids[i] for i in batch]
+            )
+            batches += 1
+        for batch in _batches(stale, batch_size):
+            vector_store.delete(ids=batch)
+        # The mmap index only appends: drop dead rows once they pile up, then retrain IVF
+        if hasattr(vector_store, "compact") and (changed or stale):
+            if vector_store.dead_fraction >= VECTOR_INDEX_COMPACT_RATIO:
+                vector_store.compact()
+            if VECTOR_INDEX_IVF:
+                from utils.vector_index import IVF_MIN_ROWS
+                if vector_store.rows >= IVF_MIN_ROWS:
+                    vector_store.build_ivf()
+    # Chroma 0.4+ persists automatically
+    
+    elapsed = time.time() - started
+    stats = {
+        "documents": len(source_ids),
+        "chunks": len(ids),
+        "upserted": len(changed),
+        "skipped": len(ids) - len(changed),
+        "deleted": len(stale),
+        "batches": batches,
+        "seconds": round(elapsed, 3),
+        "chunks_per_sec": round(len(ids) / elapsed, 1) if elapsed > 0 else 0.0
+    }
+    print(f"[RAG] Ingested {stats['documents']} docs: {stats['upserted']} upserted, "
+          f"{stats['skipped']} unchanged, {stats['deleted']} deleted ({stats['chunks_per_sec']} chunks/s)")
+    return stats
+
+def add_documents(documents: list) -> dict:
+    """
+    Adds documents to the vector store (incremental, see ingest_documents).
+    """
+    return ingest_documents(documents)
 
 def query_knowledge_base(query: str, k: int = 3):
     """
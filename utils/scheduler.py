@@ -0,0 +1,87 @@
+"""
+Shared Request Scheduler
+
+A bounded, process-wide executor for graph runs. The Streamlit script thread
+submits a job and then only renders events the worker pushes onto the job's
+queue, so one slow request never ties up the UI and every session can see
+its position in the shared queue.
+"""
+
+import itertools
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Iterable
+
+# Marks the end of a job's event stream
+DONE = object()
+
+
+class Job:
+    """A submitted request: its future plus a queue of streamed events"""
+
+    def __init__(self, job_id: int):
+        self.id = job_id
+        self.events: "queue.Queue[Any]" = queue.Queue()
+        self.future: Future = None
+
+
+class RequestScheduler:
+    """
+    Bounded thread pool with FIFO queue positions.
+    """
+
+    def __init__(self, max_workers: int = 8, max_pending: int = 200):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="graph")
+        self._pending = OrderedDict()  # job id -> None, in submission order
+        self._running = 0
+        self._completed = 0
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def submit(self, stream_fn: Callable[[], Iterable[Any]]) -> Job:
+        """
+        Queue a job. `stream_fn` is called on a worker thread and every item it
+        yields is forwarded to `job.events`, followed by DONE.
+        Raises RuntimeError when the queue is full.
+        """
+        with self._lock:
+            if len(self._pending) >= self.max_pending:
+                raise RuntimeError(f"Request queue is full ({self.max_pending} pending)")
+            job = Job(next(self._ids))
+            self._pending[job.id] = None
+        job.future = self._executor.submit(self._run, job, stream_fn)
+        return job
+
+    def _run(self, job: Job, stream_fn: Callable[[], Iterable[Any]]):
+        with self._lock:
+            self._pending.pop(job.id, None)
+            self._running += 1
+        try:
+            for event in stream_fn():
+                job.events.put(event)
+        finally:
+            job.events.put(DONE)
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+
+    def position(self, job: Job) -> int:
+        """1-based position in the wait queue, or 0 once the job has started"""
+        with self._lock:
+            for i, job_id in enumerate(self._pending, 1):
+                if job_id == job.id:
+                    return i
+        return 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "running": self._running,
+                "pending": len(self._pending),
+                "completed": self._completed
+            }
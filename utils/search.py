@@ -0,0 +1,111 @@
+"""
+BM25 Search over an Inverted Index
+
+Used by the KnowledgeAgent to rank knowledge base articles by relevance.
+The index is built once (or loaded from a JSON snapshot) and stores
+precomputed BM25 weights per posting, so a lookup only touches the postings
+of the query terms instead of scanning every article.
+"""
+
+import hashlib
+import heapq
+import json
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Tuple
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+
+STOPWORDS = frozenset("""
+a an and are as at be by can do does for from how i in is it me my of on or our
+please s the to what whats when where which who why will with you your
+""".split())
+
+# Phrasal verbs folded into one term, so "set up" matches "setup" (and a
+# stray "up" does not). Bump TOKENIZER_VERSION when changing tokenization.
+COMPOUNDS = {
+    "set up": "setup", "log in": "login", "log on": "logon", "log out": "logout",
+    "sign in": "signin", "sign on": "signon", "sign out": "signout", "sign up": "signup",
+    "back up": "backup", "start up": "startup", "shut down": "shutdown",
+}
+_COMPOUND_RE = re.compile(r"\b(" + "|".join(c.replace(" ", r"[\s-]+") for c in COMPOUNDS) + r")\b")
+TOKENIZER_VERSION = 2
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stopwords; compounds are joined (set up -> setup), hyphenated words also yield their joined form (wi-fi -> wifi)"""
+    tokens = []
+    text = _COMPOUND_RE.sub(lambda m: COMPOUNDS[" ".join(re.split(r"[\s-]+", m.group(1)))], text.lower())
+    for token in _TOKEN_RE.findall(text):
+        if "-" in token:
+            parts = token.split("-")
+            tokens.extend(p for p in parts if p not in STOPWORDS)
+            token = "".join(parts)
+        if token not in STOPWORDS:
+            tokens.append(token)
+    return tokens
+
+
+class BM25Index:
+    """
+    Immutable inverted index with precomputed BM25 weights.
+    """
+
+    def __init__(self, doc_ids: List[str], postings: Dict[str, List[Tuple[int, float]]], fingerprint: str = None):
+        self.doc_ids = doc_ids
+        self.postings = postings
+        self.fingerprint = fingerprint  # identifies the corpus and parameters the index was built from
+
+    @staticmethod
+    def corpus_fingerprint(documents: Dict[str, str], k1: float = 1.5, b: float = 0.75) -> str:
+        """Hash of the documents, BM25 parameters and tokenizer; a snapshot is only valid for a matching fingerprint"""
+        digest = hashlib.sha256(json.dumps([k1, b, TOKENIZER_VERSION], sort_keys=True).encode())
+        for doc_id in sorted(documents):
+            digest.update(json.dumps([doc_id, documents[doc_id]]).encode())
+        return digest.hexdigest()
+
+    @classmethod
+    def from_documents(cls, documents: Dict[str, str], k1: float = 1.5, b: float = 0.75) -> "BM25Index":
+        """Build the index from a {doc_id: text} mapping"""
+        doc_ids = list(documents)
+        term_freqs = [Counter(tokenize(documents[doc_id])) for doc_id in doc_ids]
+        lengths = [sum(tf.values()) for tf in term_freqs]
+        avg_len = (sum(lengths) / len(lengths)) if lengths else 0.0
+
+        doc_freq = Counter()
+        for tf in term_freqs:
+            doc_freq.update(tf.keys())
+
+        n_docs = len(doc_ids)
+        postings: Dict[str, List[Tuple[int, float]]] = {}
+        for doc_idx, tf in enumerate(term_freqs):
+            norm = k1 * (1 - b + b * lengths[doc_idx] / avg_len) if avg_len else k1
+            for term, freq in tf.items():
+                idf = math.log(1 + (n_docs - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5))
+                weight = idf * freq * (k1 + 1) / (freq + norm)
+                postings.setdefault(term, []).append((doc_idx, weight))
+
+        return cls(doc_ids, postings, cls.corpus_fingerprint(documents, k1, b))
+
+    def search(self, query: str, k: int = 3) -> List[Tuple[str, float]]:
+        """Top-k (doc_id, score) pairs for the query, best first"""
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            for doc_idx, weight in self.postings.get(term, ()):
+                scores[doc_idx] = scores.get(doc_idx, 0.0) + weight
+        top = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [(self.doc_ids[doc_idx], score) for doc_idx, score in top]
+
+    def save(self, path: str):
+        """Write a JSON snapshot of the index"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"fingerprint": self.fingerprint, "doc_ids": self.doc_ids, "postings": self.postings}, f)
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        """Load an index from a JSON snapshot"""
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        postings = {term: [tuple(p) for p in plist] for term, plist in data["postings"].items()}
+        return cls(data["doc_ids"], postings, data.get("fingerprint"))
@@ -0,0 +1,392 @@
+"""
+Memory-Mapped Vector Index
+
+A read-mostly alternative to Chroma for the RAG store. Embeddings live in a
+flat float32 matrix file that is opened with a zero-copy `np.memmap`, so
+startup does not load a database and several worker processes share one
+page-cached index.
+
+Search is exact top-k with batched NumPy dot products. For large corpora an
+optional IVF (inverted file) mode clusters the vectors with k-means and only
+scores the `nprobe` closest clusters; `build_ivf()` trains it (ingest_documents
+does so when VECTOR_INDEX_IVF=1).
+
+Writes only append, so upserts and deletes leave dead rows behind; `compact()`
+rewrites the files without them (ingest_documents calls it once they pile up).
+
+Layout of `persist_directory`:
+- index.json    {"dim": <int>, "generation": <int>}
+- vectors.f32   row-major float32 matrix, one L2-normalized row per chunk
+- meta.jsonl    one record per row ({"id", "text", "metadata"}) or tombstone ({"deleted": id})
+- ivf.npz       optional IVF centroids and row assignments
+
+Compaction writes the next generation's files (vectors.<n>.f32, ...) and then
+switches index.json, so a crash never leaves a half-written index behind.
+"""
+
+import json
+import os
+import threading
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+# Rows scored per block in exact search, bounds temporary memory
+_SEARCH_BLOCK_ROWS = 65536
+# Below this many rows exact search is used even if an IVF index exists
+IVF_MIN_ROWS = 10000
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+
+def _match(metadata: dict, where: Optional[dict]) -> bool:
+    """Subset of Chroma's `where` filter: {key: value} and {key: {"$in": [...]}}"""
+    if not where:
+        return True
+    for key, cond in where.items():
+        value = (metadata or {}).get(key)
+        if isinstance(cond, dict) and "$in" in cond:
+            if value not in cond["$in"]:
+                return False
+        elif value != cond:
+            return False
+    return True
+
+
+class MmapVectorStore(VectorStore):
+    """
+    LangChain vector store backed by a memory-mapped float32 matrix.
+    Single writer, many readers.
+    """
+
+    def __init__(self, persist_directory: str, embedding_function: Embeddings, nprobe: int = 8):
+        self.persist_directory = persist_directory
+        self.embedding_function = embedding_function
+        self.nprobe = nprobe
+        self._lock = threading.RLock()
+        os.makedirs(persist_directory, exist_ok=True)
+        self._load()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding_function
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.persist_directory, name)
+
+    def _file(self, kind: str, generation: int = None) -> str:
+        """Path of the vectors/meta/ivf file of a generation (the current one by default)"""
+        generation = self.generation if generation is None else generation
+        name, ext = {"vectors": ("vectors", "f32"), "meta": ("meta", "jsonl"), "ivf": ("ivf", "npz")}[kind]
+        return self._path(f"{name}.{ext}" if not generation else f"{name}.{generation}.{ext}")
+
+    def _write_index(self):
+        tmp = self._path("index.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump({"dim": self.dim, "generation": self.generation}, f)
+        os.replace(tmp, self._path("index.json"))
+
+    @property
+    def rows(self) -> int:
+        """Live rows"""
+        return len(self._row_of)
+
+    @property
+    def dead_fraction(self) -> float:
+        """Share of stored rows that were replaced or deleted"""
+        return 1 - len(self._row_of) / len(self._ids) if self._ids else 0.0
+
+    # --- Loading ---
+
+    def _load(self):
+        """(Re)open the index: replay metadata and mmap the vector file"""
+        self.dim = None
+        self.generation = 0
+        if os.path.exists(self._path("index.json")):
+            with open(self._path("index.json")) as f:
+                index = json.load(f)
+            self.dim = index["dim"]
+            self.generation = index.get("generation", 0)
+
+        self._ids: List[str] = []
+        self._texts: List[str] = []
+        self._metadatas: List[dict] = []
+        self._row_of: Dict[str, int] = {}
+        if os.path.exists(self._file("meta")):
+            with open(self._file("meta"), encoding="utf-8") as f:
+                for line in f:
+                    record = json.loads(line)
+                    if "deleted" in record:
+                        self._row_of.pop(record["deleted"], None)
+                        continue
+                    self._row_of[record["id"]] = len(self._ids)
+                    self._ids.append(record["id"])
+                    self._texts.append(record["text"])
+                    self._metadatas.append(record.get("metadata") or {})
+
+        self._alive = np.zeros(len(self._ids), dtype=bool)
+        self._alive[list(self._row_of.values())] = True
+        self._map_vectors()
+        self._load_ivf()
+
+    def _map_vectors(self):
+        """Zero-copy read-only view of the vector file"""
+        n_rows = len(self._ids)
+        if n_rows and self.dim:
+            self._vectors = np.memmap(self._file("vectors"), dtype=np.float32, mode="r", shape=(n_rows, self.dim))
+        else:
+            self._vectors = np.zeros((0, self.dim or 0), dtype=np.float32)
+
+    def _load_ivf(self):
+        self._centroids = None
+        self._lists = None
+        if not os.path.exists(self._file("ivf")) or not len(self._ids):
+            return
+        data = np.load(self._file("ivf"))
+        centroids, assign = data["centroids"], data["assign"]
+        if len(assign) < len(self._ids):
+            # Rows appended since the IVF was trained go to their nearest centroid
+            extra = self._assign(self._vectors[len(assign):], centroids)
+            assign = np.concatenate([assign, extra])
+        self._set_ivf(centroids, assign)
+
+    def _ivf_assignments(self) -> np.ndarray:
+        assign = np.empty(len(self._ids), dtype=np.int32)
+        for c, rows in enumerate(self._lists):
+            assign[rows] = c
+        return assign
+
+    def _set_ivf(self, centroids: np.ndarray, assign: np.ndarray):
+        order = np.argsort(assign, kind="stable")
+        bounds = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=len(centroids)))])
+        self._centroids = centroids
+        self._lists = [order[bounds[c]:bounds[c + 1]] for c in range(len(centroids))]
+
+    # --- Writing ---
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any
+    ) -> List[str]:
+        """Embed and append texts; existing ids are replaced (upsert)"""
+        texts = list(texts)
+        if not texts:
+            return []
+        ids = list(ids) if ids else [str(uuid.uuid4()) for _ in texts]
+        metadatas = metadatas or [{} for _ in texts]
+
+        vectors = _normalize(np.asarray(self.embedding_function.embed_documents(texts), dtype=np.float32))
+        with self._lock:
+            if self.dim is None:
+                self.dim = int(vectors.shape[1])
+                self._write_index()
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match index dimension {self.dim}")
+
+            with open(self._file("vectors"), "ab") as f:
+                f.write(vectors.tobytes())
+            with open(self._file("meta"), "a", encoding="utf-8") as f:
+                for chunk_id, text, meta in zip(ids, texts, metadatas):
+                    f.write(json.dumps({"id": chunk_id, "text": text, "metadata": meta}) + "\n")
+
+            # Update the in-memory view instead of replaying the whole file
+            first_row = len(self._ids)
+            alive = np.ones(len(ids), dtype=bool)
+            for offset, chunk_id in enumerate(ids):
+                old_row = self._row_of.get(chunk_id)
+                if old_row is not None:
+                    if old_row >= first_row:
+                        alive[old_row - first_row] = False
+                    else:
+                        self._alive[old_row] = False
+                self._row_of[chunk_id] = first_row + offset
+            self._ids.extend(ids)
+            self._texts.extend(texts)
+            self._metadatas.extend(metadatas)
+            self._alive = np.concatenate([self._alive, alive])
+            self._map_vectors()
+            if self._centroids is not None:
+                assign = np.empty(len(self._ids), dtype=np.int32)
+                assign[:first_row] = self._ivf_assignments()[:first_row]
+                assign[first_row:] = self._assign(vectors, self._centroids)
+                self._set_ivf(self._centroids, assign)
+        return ids
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        """Tombstone the given ids"""
+        if not ids:
+            return False
+        with self._lock:
+            with open(self._file("meta"), "a", encoding="utf-8") as f:
+                for chunk_id in ids:
+                    f.write(json.dumps({"deleted": chunk_id}) + "\n")
+            for chunk_id in ids:
+                row = self._row_of.pop(chunk_id, None)
+                if row is not None:
+                    self._alive[row] = False
+        return True
+
+    def get(self, ids: Optional[List[str]] = None, where: Optional[dict] = None, include: Optional[List[str]] = None, **kwargs: Any) -> dict:
+        """Chroma-compatible lookup by ids and/or a simple metadata filter"""
+        rows = [self._row_of[i] for i in ids if i in self._row_of] if ids is not None else sorted(self._row_of.values())
+        rows = [r for r in rows if _match(self._metadatas[r], where)]
+        return {
+            "ids": [self._ids[r] for r in rows],
+            "documents": [self._texts[r] for r in rows],
+            "metadatas": [self._metadatas[r] for r in rows]
+        }
+
+    def build_ivf(self, n_lists: Optional[int] = None, iterations: int = 10, sample_size: int = 50000, seed: int = 0):
+        """Train IVF centroids with spherical k-means and persist the row assignments"""
+        with self._lock:
+            alive_rows = np.flatnonzero(self._alive)
+            if not len(alive_rows):
+                return
+            n_lists = n_lists or max(1, int(np.sqrt(len(alive_rows))))
+            rng = np.random.default_rng(seed)
+            sample = self._vectors[rng.choice(alive_rows, min(sample_size, len(alive_rows)), replace=False)]
+            n_lists = min(n_lists, len(sample))
+
+            centroids = np.array(sample[rng.choice(len(sample), n_lists, replace=False)], dtype=np.float32)
+            for _ in range(iterations):
+                assign = np.argmax(sample @ centroids.T, axis=1)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, assign, sample)
+                counts = np.bincount(assign, minlength=n_lists)
+                centroids = np.where(counts[:, None] > 0, sums, centroids)
+                centroids = _normalize(centroids.astype(np.float32))
+
+            assign = self._assign(self._vectors, centroids)
+            np.savez(self._file("ivf"), centroids=centroids, assign=assign)
+            self._set_ivf(centroids, assign)
+        print(f"[VectorIndex] Built IVF with {n_lists} lists over {len(alive_rows)} vectors")
+
+    def compact(self) -> int:
+        """Rewrite the index without replaced or deleted rows; returns how many rows were dropped"""
+        with self._lock:
+            keep = np.flatnonzero(self._alive)
+            dropped = len(self._ids) - len(keep)
+            if not dropped:
+                return 0
+            old = [self._file(kind) for kind in ("vectors", "meta", "ivf")]
+            generation = self.generation + 1
+
+            with open(self._file("vectors", generation), "wb") as f:
+                for start in range(0, len(keep), _SEARCH_BLOCK_ROWS):
+                    f.write(np.ascontiguousarray(self._vectors[keep[start:start + _SEARCH_BLOCK_ROWS]]).tobytes())
+            with open(self._file("meta", generation), "w", encoding="utf-8") as f:
+                for row in keep:
+                    f.write(json.dumps({"id": self._ids[row], "text": self._texts[row], "metadata": self._metadatas[row]}) + "\n")
+            if self._centroids is not None:
+                np.savez(self._file("ivf", generation), centroids=self._centroids, assign=self._ivf_assignments()[keep])
+
+            # index.json is the commit point: readers see either the old or the new files
+            self.generation = generation
+            self._write_index()
+            for path in old:
+                if os.path.exists(path):
+                    os.remove(path)
+            self._load()
+        print(f"[VectorIndex] Compacted: dropped {dropped} dead rows, {len(keep)} kept")
+        return dropped
+
+    @staticmethod
+    def _assign(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        assign = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), _SEARCH_BLOCK_ROWS):
+            block = vectors[start:start + _SEARCH_BLOCK_ROWS]
+            assign[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        return assign
+
+    # --- Searching ---
+
+    def search_vectors(self, queries: np.ndarray, k: int = 4, where: Optional[dict] = None) -> List[List[Tuple[int, float]]]:
+        """Top-k (row, score) pairs for each query vector, scored by cosine similarity"""
+        queries = _normalize(np.atleast_2d(np.asarray(queries, dtype=np.float32)).copy())
+        vectors, alive = self._vectors, self._alive
+        if where:
+            alive = alive.copy()
+            for r in np.flatnonzero(alive):
+                alive[r] = _match(self._metadatas[r], where)
+        if not alive.any():
+            return [[] for _ in queries]
+
+        if self._lists is not None and len(vectors) >= IVF_MIN_ROWS:
+            return [self._search_ivf(q, k, alive) for q in queries]
+
+        # Exact search: blocked (n_queries x rows) matmul over the mmap
+        scores = np.empty((len(queries), len(vectors)), dtype=np.float32)
+        for start in range(0, len(vectors), _SEARCH_BLOCK_ROWS):
+            block = vectors[start:start + _SEARCH_BLOCK_ROWS]
+            scores[:, start:start + len(block)] = queries @ block.T
+        scores[:, ~alive] = -np.inf
+        return [self._top_k(np.arange(len(vectors)), row, k) for row in scores]
+
+    def _search_ivf(self, query: np.ndarray, k: int, alive: np.ndarray) -> List[Tuple[int, float]]:
+        nprobe = min(self.nprobe, len(self._centroids))
+        probes = np.argpartition(-(self._centroids @ query), nprobe - 1)[:nprobe]
+        candidates = np.concatenate([self._lists[c] for c in probes])
+        candidates = candidates[alive[candidates]]
+        if not len(candidates):
+            return []
+        candidates.sort()
+        return self._top_k(candidates, self._vectors[candidates] @ query, k)
+
+    @staticmethod
+    def _top_k(rows: np.ndarray, scores: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(rows[i]), float(scores[i])) for i in top if np.isfinite(scores[i])]
+
+    def _documents(self, hits: List[Tuple[int, float]]) -> List[Tuple[Document, float]]:
+        return [
+            (Document(page_content=self._texts[row], metadata=self._metadatas[row]), score)
+            for row, score in hits
+        ]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, filter: Optional[dict] = None, **kwargs: Any) -> List[Tuple[Document, float]]:
+        query_vector = self.embedding_function.embed_query(query)
+        return self._documents(self.search_vectors(query_vector, k, where=filter)[0])
+
+    def similarity_search(self, query: str, k: int = 4, filter: Optional[dict] = None, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter=filter)]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, filter: Optional[dict] = None, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self._documents(self.search_vectors(embedding, k, where=filter)[0])]
+
+    def similarity_search_batch(self, queries: List[str], k: int = 4) -> List[List[Document]]:
+        """Embed and search many queries with one matrix product"""
+        query_vectors = self.embedding_function.embed_documents(queries)
+        return [[doc for doc, _ in self._documents(hits)] for hits in self.search_vectors(query_vectors, k)]
+
+    def _select_relevance_score_fn(self):
+        # Rows are normalized, so scores are already cosine similarities
+        return lambda score: score
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        persist_directory: str = "./vector_index",
+        **kwargs: Any
+    ) -> "MmapVectorStore":
+        store = cls(persist_directory=persist_directory, embedding_function=embedding, **kwargs)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store